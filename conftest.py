@@ -0,0 +1,41 @@
+"""
+Shared pytest fixtures for the cluster test scripts in the repository root.
+"""
+
+import pytest
+from dotenv import load_dotenv
+
+# Scanned once per session and shared by test_full, test_scanner and test_patch_debug
+DEV_SCANS = [("deployments", "dev"), ("services", "dev"), ("configmaps", "dev")]
+
+
+def pytest_configure(config):
+    # Read .env once for the whole session, before test modules are imported;
+    # scripts run on their own load it in their __main__ path instead
+    load_dotenv()
+
+
+@pytest.fixture(scope="session")
+def cluster_scanner():
+    """ClusterScanner for the session; skips cluster tests when none is reachable."""
+    from scanners.cluster_scanner import ClusterScanner
+
+    try:
+        scanner = ClusterScanner()
+    except Exception as e:
+        pytest.skip(f"Cluster not reachable: {e}")
+
+    with scanner:
+        yield scanner
+
+
+@pytest.fixture(scope="session")
+def dev_scans(cluster_scanner):
+    """Resources of each DEV_SCANS entry, keyed by (resource_type, namespace)."""
+    return cluster_scanner.scan_many(DEV_SCANS)
+
+
+@pytest.fixture(scope="session")
+def dev_deployments(dev_scans):
+    """Deployments in the dev namespace."""
+    return dev_scans[("deployments", "dev")]
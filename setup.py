@@ -1,9 +1,20 @@
+import os
 from setuptools import setup, find_packages
 
+# Optionally compile the patch merge helpers to a C extension (pip install mypy)
+ext_modules = []
+if os.getenv("AI_KUSTOMIZE_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules = mypycify(["src/agents/patch_merge.py"])
+
 setup(
     name="ai-kustomize-agent",
     version="0.1.0",
     packages=find_packages(),
+    ext_modules=ext_modules,
+    package_data={
+        'src.api': ['static/*.html'],
+    },
     entry_points={
         'console_scripts': [
             'ai-kustomize=src.main:main',
@@ -11,7 +22,7 @@ setup(
     },
     install_requires=[
         "kubernetes>=28.1.0",
-        "google-generativeai>=0.3.0",
+        "google-generativeai>=0.5.0",
         "python-dotenv>=1.0.0",
         "PyYAML>=6.0",
     ],
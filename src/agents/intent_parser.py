@@ -4,15 +4,230 @@ Supports both Google Gemini and Azure OpenAI.
 """
 
 import os
+import re
+import copy
 import json
+import hashlib
+import atexit
+import bisect
+import asyncio
 import logging
-from typing import Dict, Any
+import functools
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 logger = logging.getLogger(__name__)
 
+# orjson is optional; it decodes AI responses several times faster than json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Determine AI provider
 AI_PROVIDER = os.getenv("AI_PROVIDER", "azure").lower()
 
+# Max in-flight async AI calls (keeps batches under provider rate limits)
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "16"))
+
+# Output token cap per AI call; an intent is well under 100 tokens
+AI_MAX_OUTPUT_TOKENS = int(os.getenv("AI_MAX_OUTPUT_TOKENS", "512"))
+
+# Completions requested per Azure OpenAI call; the first that yields valid
+# intents is used. Extra candidates cost output tokens, not round trips.
+AI_CANDIDATES = max(1, int(os.getenv("AI_CANDIDATES", "1")))
+
+# Attempts per AI call when the provider reports a transient failure (429, 5xx, network)
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "5"))
+
+# Number of parsed requests kept in the in-process response cache (0 disables it)
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "1024"))
+
+# On-disk cache shared by all processes (API workers, repeated CLI runs) when
+# diskcache is installed; off unless AI_CACHE_DIR names a directory
+AI_CACHE_DIR = os.getenv("AI_CACHE_DIR", "")
+
+# Seconds an on-disk cache entry stays valid (0 = until evicted)
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", "86400"))
+
+# Static instructions, sent as the system message so providers can cache them
+SYSTEM_PROMPT = """You are a Kubernetes intent parser. Convert natural language requests into structured intents for Kustomize patch generation.
+
+RULES:
+1. Return ONLY a JSON object: {"intents": [...]}. Never return a Kubernetes manifest or Markdown.
+2. If a request has multiple parts, split them into multiple intent objects.
+
+INTENT SCHEMA:
+{"action":"add|update|remove|set","resource_type":"deployments|pods|services|configmaps|all","target_field":"resources.limits.memory|resources.limits.cpu|image|labels|annotations|securityContext|replicas","value":"string or object","namespace":null,"label_selector":null,"conditions":{"only_if_missing":false,"container_name":null},"description":"reasoning"}
+
+EXAMPLE:
+USER REQUEST: "Update nginx to v1.16 and add label env=prod"
+{"intents":[{"action":"update","resource_type":"deployments","target_field":"image","value":"nginx:v1.16","description":"Update nginx container image to v1.16"},{"action":"add","resource_type":"deployments","target_field":"labels","value":{"env":"prod"},"description":"Add production environment label"}]}"""
+
+# Response cleanup patterns (markdown fences, trailing commas before ] or })
+_FENCE_RE = re.compile(r"```(?:json)?")
+_TRAIL_COMMA_RE = re.compile(r',\s*([\]\}])')
+_DECODER = json.JSONDecoder()
+
+# Opening of the intents array in a (possibly partial) streamed response
+_INTENTS_ARRAY_RE = re.compile(r'"intents"\s*:\s*\[')
+
+# Fields every intent must carry; missing ones are filled with "unknown"
+_REQUIRED_FIELDS = ("action", "resource_type", "target_field")
+
+# Keyword tables for _fallback_parse; the first matching keyword wins
+_FALLBACK_RESOURCES = (
+    ("service", "services"),
+    ("pod", "pods"),
+    ("configmap", "configmaps"),
+)
+_FALLBACK_ACTIONS = (
+    ("remove", "remove"),
+    ("delete", "remove"),
+    ("update", "update"),
+    ("change", "update"),
+)
+_FALLBACK_TARGETS = (
+    ("memory", "resources.limits.memory"),
+    ("cpu", "resources.limits.cpu"),
+    ("image", "image"),
+    ("label", "labels"),
+    ("annotation", "annotations"),
+)
+
+# Every fallback keyword in one alternation, so a request is scanned once.
+# No keyword contains another, so non-overlapping matches find them all.
+_FALLBACK_KEYWORD_RE = re.compile("|".join(
+    re.escape(keyword)
+    for table in (_FALLBACK_RESOURCES, _FALLBACK_ACTIONS, _FALLBACK_TARGETS)
+    for keyword, _ in table
+))
+
+# Namespace in a fallback request: the word after the last " in "
+_FALLBACK_NAMESPACE_RE = re.compile(r".* in \s*(\S+)", re.S)
+
+# Per-request user message is the request wrapped in these fixed segments
+_PROMPT_PREFIX = 'USER REQUEST: "'
+_PROMPT_SUFFIX = '"'
+
+# Part of every on-disk cache key, so editing the prompt invalidates old entries
+_PROMPT_HASH = hashlib.blake2b(
+    (SYSTEM_PROMPT + _PROMPT_PREFIX + _PROMPT_SUFFIX).encode(), digest_size=8
+).hexdigest()
+
+
+def _match_keyword(found: set, table, default: str) -> str:
+    """Return the value for the first keyword in table that was found."""
+    return next((value for keyword, value in table if keyword in found), default)
+
+
+# Rate-limit, server and connection errors worth retrying, for whichever
+# provider SDKs are installed
+_TRANSIENT_ERRORS: tuple = ()
+try:
+    import openai
+    _TRANSIENT_ERRORS += (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+except ImportError:
+    pass
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    _TRANSIENT_ERRORS += (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+    )
+except ImportError:
+    pass
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """True for rate-limit, server and connection errors worth retrying."""
+    return isinstance(exc, _TRANSIENT_ERRORS)
+
+
+def _log_retry(retry_state):
+    logger.warning(
+        f"AI call failed (attempt {retry_state.attempt_number}/{AI_MAX_RETRIES}), "
+        f"retrying: {retry_state.outcome.exception()}"
+    )
+
+
+# Exponential backoff with full jitter for provider calls; the last error is re-raised
+_retry_transient = retry(
+    wait=wait_random_exponential(multiplier=1, max=30),
+    stop=stop_after_attempt(AI_MAX_RETRIES),
+    retry=retry_if_exception(_is_transient),
+    before_sleep=_log_retry,
+    reraise=True,
+)
+
+
+def _build_prompt(request: str) -> str:
+    """Build the per-request user message."""
+    return _PROMPT_PREFIX + request + _PROMPT_SUFFIX
+
+
+def _build_batch_prompt(requests: List[str]) -> str:
+    """Build one user message asking for intents from several numbered requests."""
+    numbered = [{"id": i, "text": r} for i, r in enumerate(requests)]
+    return (
+        f"USER REQUESTS: {json.dumps(numbered)}\n"
+        'Parse every request. Add "request_id" (the request\'s id) to each intent.'
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _get_azure_client(api_key: str, endpoint: str, api_version: str):
+    """
+    Build the sync Azure OpenAI client, shared by every IntentParser with the
+    same credentials so its connection pool is reused.
+    """
+    from openai import AzureOpenAI
+    
+    # Retries are handled by _retry_transient, so the SDK's own are disabled
+    client = AzureOpenAI(
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=endpoint,
+        max_retries=0
+    )
+    atexit.register(client.close)
+    return client
+
+
+def _new_async_azure_client(api_key: str, endpoint: str, api_version: str):
+    """Build an async Azure OpenAI client; its connections belong to the running loop."""
+    from openai import AsyncAzureOpenAI
+    
+    return AsyncAzureOpenAI(
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=endpoint,
+        max_retries=0,
+        http_client=_async_http_client()
+    )
+
+
+def _async_http_client():
+    """Build a pooled HTTP client for concurrent Azure calls (None = SDK default)."""
+    try:
+        import httpx
+        from openai import DefaultAsyncHttpxClient
+    except ImportError:
+        return None
+    
+    return DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=100)
+    )
+
 
 class IntentParser:
     """Parses natural language into structured modification intents."""
@@ -20,6 +235,21 @@ class IntentParser:
     def __init__(self):
         self.enabled = False
         self.provider = AI_PROVIDER
+        self.model_name = None
+        # Event loop -> semaphore; asyncio primitives can't be shared across
+        # loops, and each asyncio.run() call brings a new one
+        self._sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Event loop -> async AI client, for the same reason: pooled
+        # connections are bound to the loop that opened them
+        self._aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._azure_credentials = None
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._disk_cache = self._open_disk_cache()
         
         if self.provider == "azure":
             self._init_azure_openai()
@@ -31,20 +261,20 @@ class IntentParser:
     def _init_azure_openai(self):
         """Initialize Azure OpenAI client."""
         try:
-            from openai import AzureOpenAI
-            
             api_key = os.getenv("AZURE_OPENAI_API_KEY")
             endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
             deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
             api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
             
             if api_key and endpoint:
-                self.client = AzureOpenAI(
-                    api_key=api_key,
-                    api_version=api_version,
-                    azure_endpoint=endpoint
-                )
+                self.client = _get_azure_client(api_key, endpoint, api_version)
+                # Async clients are built per event loop by _aclient()
+                self._azure_credentials = (api_key, endpoint, api_version)
                 self.deployment_name = deployment
+                self.model_name = deployment
+                self._dispatch = self._parse_with_azure
+                self._adispatch = self._aparse_with_azure
+                self._astream_text = self._astream_azure
                 self.enabled = True
                 logger.info(f"Azure OpenAI initialized with deployment: {deployment}")
             else:
@@ -63,8 +293,15 @@ class IntentParser:
             api_key = os.getenv("GEMINI_API_KEY")
             if api_key:
                 genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-1.5-flash')
+                self.model_name = 'gemini-1.5-flash'
+                self.model = genai.GenerativeModel(
+                    self.model_name,
+                    system_instruction=SYSTEM_PROMPT
+                )
                 self.genai = genai
+                self._dispatch = self._parse_with_gemini
+                self._adispatch = self._aparse_with_gemini
+                self._astream_text = self._astream_gemini
                 self.enabled = True
                 logger.info("Gemini AI initialized")
             else:
@@ -86,222 +323,520 @@ class IntentParser:
             Structured intent dictionary
         """
         if not self.enabled:
-            return self._fallback_parse(request)
+            return {"intents": [self._fallback_parse(request)]}
+        
+        cache_key = self._cache_key(request)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            prompt = self._build_prompt(request)
-            
-            if self.provider == "azure":
-                return self._parse_with_azure(prompt)
-            elif self.provider == "gemini":
-                return self._parse_with_gemini(prompt)
-            else:
-                return self._fallback_parse(request)
+            result = self._dispatch(_build_prompt(request))
+        except Exception as e:
+            logger.error(f"AI parsing failed: {e}")
+            return {"error": str(e)}
+        
+        self._cache_put(cache_key, result)
+        return result
+    
+    def parse_many(self, requests: List[str]) -> List[Dict[str, Any]]:
+        """
+        Parse several requests with a single AI call.
+        
+        The model tags each intent with the index of the request it came
+        from. If the response can't be mapped back, each request is parsed
+        on its own instead.
+        
+        Args:
+            requests: List of natural language requests
+        
+        Returns:
+            List of intent dictionaries, in the same order as requests
+        """
+        if not self.enabled:
+            return [{"intents": [intent]} for intent in self._fallback_parse_batch(requests)]
+        
+        results = [self._cache_get(self._cache_key(r)) for r in requests]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if len(pending) < 2:
+            return [result if result is not None else self.parse(r) for r, result in zip(requests, results)]
+        
+        batch = [requests[i] for i in pending]
+        try:
+            result = self._dispatch(
+                _build_batch_prompt(batch),
+                AI_MAX_OUTPUT_TOKENS * len(batch)
+            )
+            grouped = self._group_by_request(result, len(batch))
+        except Exception as e:
+            logger.error(f"Batched AI parsing failed: {e}")
+            grouped = None
+        
+        if grouped is None:
+            logger.warning("Could not map batched response to requests, parsing one by one")
+            for i in pending:
+                results[i] = self.parse(requests[i])
+            return results
+        
+        for i, intents in zip(pending, grouped):
+            results[i] = {"intents": intents}
+            self._cache_put(self._cache_key(requests[i]), results[i])
+        return results
+    
+    async def aparse(self, request: str) -> Dict[str, Any]:
+        """
+        Async variant of parse() for concurrent callers.
+        
+        Args:
+            request: User's natural language request
+        
+        Returns:
+            Structured intent dictionary
+        """
+        if not self.enabled:
+            return {"intents": [self._fallback_parse(request)]}
+        
+        cache_key = self._cache_key(request)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            prompt = _build_prompt(request)
             
+            async with self._semaphore():
+                result = await self._adispatch(prompt)
         except Exception as e:
             logger.error(f"AI parsing failed: {e}")
             return {"error": str(e)}
+        
+        self._cache_put(cache_key, result)
+        return result
     
-    def _parse_with_azure(self, prompt: str) -> Dict[str, Any]:
-        """Parse using Azure OpenAI."""
-        response = self.client.chat.completions.create(
-            model=self.deployment_name,
-            messages=[
+    async def aparse_batch(self, requests: List[str]) -> List[Dict[str, Any]]:
+        """
+        Parse several requests concurrently (bounded by AI_MAX_CONCURRENCY).
+        
+        Args:
+            requests: List of natural language requests
+        
+        Returns:
+            List of intent dictionaries, in the same order as requests
+        """
+        return await asyncio.gather(*[self.aparse(r) for r in requests])
+    
+    async def astream_intents(self, request: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield intents one by one while the AI response is still streaming.
+        
+        Interactive callers can start scanning for the first intent before the
+        model has finished generating the rest. If the AI call or the final
+        parse fails, an {"error": ...} dictionary (as parse() would return) is
+        yielded last, even after some intents; the intents before it are then
+        an incomplete set and shouldn't be acted on.
+        
+        Args:
+            request: User's natural language request
+        
+        Yields:
+            Intent dictionaries, then an {"error": ...} dictionary on failure
+        """
+        if not self.enabled:
+            yield self._fallback_parse(request)
+            return
+        
+        cache_key = self._cache_key(request)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            for intent in cached["intents"]:
+                yield intent
+            return
+        
+        prompt = _build_prompt(request)
+        buffer = ""
+        pos = None  # offset inside the "intents" array once it has been seen
+        streamed = 0
+        
+        try:
+            async with self._semaphore():
+                async for piece in self._astream_text(prompt):
+                    buffer += piece
+                    if pos is None:
+                        match = _INTENTS_ARRAY_RE.search(buffer)
+                        if not match:
+                            continue
+                        pos = match.end()
+                    
+                    pos, intents = self._decode_complete_intents(buffer, pos)
+                    for intent in intents:
+                        streamed += 1
+                        yield intent
+        except Exception as e:
+            logger.error(f"AI streaming failed: {e}")
+            yield {"error": str(e)}
+            return
+        
+        # Parse the full text too: it covers responses without an intents array
+        result = self._parse_response(buffer)
+        if result.get("error"):
+            yield result
+            return
+        
+        self._cache_put(cache_key, result)
+        for intent in result["intents"][streamed:]:
+            yield intent
+    
+    def _decode_complete_intents(self, buffer: str, pos: int):
+        """Decode every complete intent object in buffer starting at pos."""
+        intents = []
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer) or buffer[pos] != '{':
+                return pos, intents
+            
+            try:
+                obj, pos = _DECODER.raw_decode(buffer, pos)
+            except ValueError:
+                # Object not fully received yet
+                return pos, intents
+            
+            self._fill_required(obj)
+            intents.append(obj)
+    
+    async def _astream_azure(self, prompt: str) -> AsyncIterator[str]:
+        """Yield raw response text chunks from Azure OpenAI."""
+        stream = await self._aclient().chat.completions.create(
+            **self._azure_params(prompt),
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def _astream_gemini(self, prompt: str) -> AsyncIterator[str]:
+        """Yield raw response text chunks from Google Gemini."""
+        response = await self.model.generate_content_async(
+            prompt,
+            generation_config=self._gemini_config(),
+            stream=True
+        )
+        async for chunk in response:
+            yield chunk.text
+    
+    def _semaphore(self) -> asyncio.Semaphore:
+        """The AI_MAX_CONCURRENCY semaphore of the running event loop."""
+        loop = asyncio.get_running_loop()
+        sem = self._sems.get(loop)
+        if sem is None:
+            sem = self._sems[loop] = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+        return sem
+    
+    def _aclient(self):
+        """The async Azure OpenAI client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        aclient = self._aclients.get(loop)
+        if aclient is None:
+            aclient = self._aclients[loop] = _new_async_azure_client(*self._azure_credentials)
+        return aclient
+    
+    async def aclose(self):
+        """Close the running event loop's async AI client, e.g. before the loop ends."""
+        aclient = self._aclients.pop(asyncio.get_running_loop(), None)
+        if aclient is not None:
+            await aclient.close()
+    
+    def _open_disk_cache(self):
+        """Open the shared on-disk cache, or None if disabled or diskcache is missing."""
+        if not AI_CACHE_DIR or AI_CACHE_SIZE <= 0:
+            return None
+        try:
+            import diskcache
+            return diskcache.Cache(AI_CACHE_DIR)
+        except ImportError:
+            logger.warning("AI_CACHE_DIR is set but diskcache is not installed. Run: pip install diskcache")
+        except Exception as e:
+            logger.warning(f"Could not open intent cache at {AI_CACHE_DIR}: {e}")
+        return None
+    
+    def _disk_key(self, key: str) -> str:
+        """
+        Fixed-length key for the on-disk cache (non-cryptographic use).
+        
+        Covers the provider, model and prompt, so switching deployment or
+        editing SYSTEM_PROMPT misses instead of returning stale intents.
+        """
+        raw = f"{self.provider}:{self.model_name}:{_PROMPT_HASH}:{key}"
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    
+    def _cache_key(self, request: str) -> str:
+        """Collapse whitespace so trivially different spellings share a cache entry.
+        
+        Case is kept: values such as image tags and label values are case-sensitive.
+        """
+        return " ".join(request.split())
+    
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached parse result, or None on a miss."""
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+        
+        if result is None:
+            if self._disk_cache is None:
+                return None
+            try:
+                result = self._disk_cache.get(self._disk_key(key))
+            except Exception as e:
+                logger.warning(f"Intent disk cache read failed: {e}")
+                return None
+            if result is None:
+                return None
+            self._cache_put(key, result, persist=False)
+        
+        logger.debug(f"Intent cache hit: {key}")
+        return copy.deepcopy(result)
+    
+    def _cache_put(self, key: str, result: Dict[str, Any], persist: bool = True):
+        """Store a successful parse result, evicting the least recently used entry."""
+        if AI_CACHE_SIZE <= 0 or result.get("error"):
+            return
+        
+        with self._cache_lock:
+            self._cache[key] = copy.deepcopy(result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > AI_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        
+        if persist and self._disk_cache is not None:
+            try:
+                self._disk_cache.set(self._disk_key(key), result, expire=AI_CACHE_TTL or None)
+            except Exception as e:
+                logger.warning(f"Intent disk cache write failed: {e}")
+    
+    def _azure_params(
+        self,
+        prompt: str,
+        max_tokens: int = AI_MAX_OUTPUT_TOKENS,
+        candidates: int = 1
+    ) -> Dict[str, Any]:
+        """Build the chat completion arguments sent to Azure OpenAI."""
+        params = {
+            "model": self.deployment_name,
+            "messages": [
                 {
                     "role": "system",
-                    "content": "You are a Kubernetes expert. Your task is to parse user requests into SPECIFIC structured JSON intents for Kustomize patch generation. \nCRITICAL: DO NOT return a Kubernetes manifest. DO NOT return markdown. Return a JSON object with a list of one or more intent objects."
+                    "content": SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
                     "content": prompt
                 }
             ],
+            "temperature": 0.1,
+            "max_tokens": max_tokens,
+            "response_format": {"type": "json_object"}
+        }
+        if candidates > 1:
+            params["n"] = candidates
+        return params
+    
+    def _gemini_config(self, max_tokens: int = AI_MAX_OUTPUT_TOKENS):
+        """Build the Gemini generation config."""
+        return self.genai.types.GenerationConfig(
             temperature=0.1,
-            max_tokens=1000
+            max_output_tokens=max_tokens,
+            response_mime_type="application/json",
+        )
+    
+    @_retry_transient
+    def _parse_with_azure(self, prompt: str, max_tokens: int = AI_MAX_OUTPUT_TOKENS) -> Dict[str, Any]:
+        """Parse using Azure OpenAI."""
+        response = self.client.chat.completions.create(
+            **self._azure_params(prompt, max_tokens, AI_CANDIDATES)
+        )
+        
+        return self._first_valid(response.choices)
+    
+    @_retry_transient
+    async def _aparse_with_azure(self, prompt: str) -> Dict[str, Any]:
+        """Parse using the async Azure OpenAI client."""
+        response = await self._aclient().chat.completions.create(
+            **self._azure_params(prompt, candidates=AI_CANDIDATES)
         )
         
-        return self._parse_response(response.choices[0].message.content)
+        return self._first_valid(response.choices)
     
-    def _parse_with_gemini(self, prompt: str) -> Dict[str, Any]:
+    @_retry_transient
+    def _parse_with_gemini(self, prompt: str, max_tokens: int = AI_MAX_OUTPUT_TOKENS) -> Dict[str, Any]:
         """Parse using Google Gemini."""
         response = self.model.generate_content(
             prompt,
-            generation_config=self.genai.types.GenerationConfig(
-                temperature=0.1,
-                max_output_tokens=1000,
-            )
+            generation_config=self._gemini_config(max_tokens)
         )
         
         return self._parse_response(response.text)
     
-    def _build_prompt(self, request: str) -> str:
-        return f"""You are a specialized Kubernetes Intent Parser. Your job is to convert natural language requests into a list of structured intent objects for a patch generator.
-
-CRITICAL RULES:
-1. NEVER return a Kubernetes Manifest (like apiVersion: v1, Kind: Pod, etc.).
-2. NEVER return Markdown.
-3. Return ONLY a JSON object.
-4. If a request has multiple parts, split them into multiple intent objects.
-
-USER REQUEST: "{request}"
-
-EXPECTED FORMAT:
-{{
-    "intents": [
-        {{
-            "action": "add|update|remove|set",
-            "resource_type": "deployments|pods|services|configmaps|all",
-            "target_field": "resources.limits.memory|resources.limits.cpu|image|labels|annotations|securityContext|replicas",
-            "value": "the value (string or object)",
-            "namespace": "namespace name or null",
-            "description": "Reasoning for this change"
-        }}
-    ]
-}}
-
-### EXAMPLES OF CORRECT BEHAVIOR ###
-
-Request: "Update nginx to v1.16 and add label env=prod"
-Response: {{
-    "intents": [
-        {{
-            "action": "update",
-            "resource_type": "deployments",
-            "target_field": "image",
-            "value": "nginx:v1.16",
-            "description": "Update nginx container image to v1.16"
-        }},
-        {{
-            "action": "add",
-            "resource_type": "deployments",
-            "target_field": "labels",
-            "value": {{"env": "prod"}},
-            "description": "Adding production environment label"
-        }}
-    ]
-}}
-
-### EXAMPLE OF INCORRECT BEHAVIOR (DO NOT DO THIS) ###
-Incorrect Response: {{
-  "apiVersion": "apps/v1",
-  "kind": "Deployment",
-  "metadata": {{ "name": "nginx" }},
-  ...
-}}
-
-### NOW PARSE THE USER REQUEST ###
-Return ONLY the JSON object.
-"""
+    @_retry_transient
+    async def _aparse_with_gemini(self, prompt: str) -> Dict[str, Any]:
+        """Parse using Google Gemini's async API."""
+        response = await self.model.generate_content_async(
+            prompt,
+            generation_config=self._gemini_config()
+        )
+        
+        return self._parse_response(response.text)
+    
+    def _group_by_request(self, result: Dict[str, Any], count: int) -> Optional[List[List[Dict[str, Any]]]]:
+        """Split a batched parse result into per-request intent lists, or None if it doesn't map."""
+        if result.get("error"):
+            return None
+        
+        grouped = [[] for _ in range(count)]
+        for intent in result["intents"]:
+            request_id = intent.pop("request_id", None)
+            if not isinstance(request_id, int) or not 0 <= request_id < count:
+                return None
+            grouped[request_id].append(intent)
+        
+        if not all(grouped):
+            return None
+        return grouped
 
+    def _first_valid(self, choices) -> Dict[str, Any]:
+        """
+        Parse completion choices in order and return the first whose intents
+        are complete; if none are, the last parse (so its error is reported).
+        """
+        result = {"error": "AI returned no choices"}
+        for choice in choices:
+            result = self._parse_response(choice.message.content)
+            intents = result.get("intents")
+            if intents and all(
+                intent.get(field) != "unknown"
+                for intent in intents
+                for field in _REQUIRED_FIELDS
+            ):
+                return result
+        return result
+    
     def _parse_response(self, text: str) -> Dict[str, Any]:
         """Parse AI response into structured intent."""
-        import re
-        import json
-        
         try:
-            # Clean up response
             text = text.strip()
             
-            # Remove markdown markers if present
-            text = re.sub(r"```(?:json)?", "", text)
-            text = text.replace("```", "").strip()
-            
-            # Find the first '{' to start decoding
-            start_idx = text.find('{')
-            if start_idx == -1:
-                return {"error": "No JSON object found in response", "raw": text}
-            
-            # We'll try to find a valid JSON object starting from each '{'
-            decoder = json.JSONDecoder()
-            data = None
-            
-            for i in range(len(text)):
-                if text[i] == '{':
-                    try:
-                        segment = text[i:]
-                        segment = re.sub(r',\s*([\]\}])', r'\1', segment)
-                        
-                        obj, end_pos = decoder.raw_decode(segment)
-                        if isinstance(obj, dict):
-                            data = obj
-                            break
-                    except (json.JSONDecodeError, ValueError):
-                        continue
+            # JSON mode returns a bare object; only scan for one if that fails
+            try:
+                data = _json_loads(text)
+            except json.JSONDecodeError:
+                data = self._extract_json(text)
             
             if not data:
                 return {"error": "Could not extract valid JSON from AI response", "raw": text}
             
             # Normalize to include "intents" list
             intents = []
-            if "intents" in data and isinstance(data["intents"], list):
+            if isinstance(data, list):
+                # List of intents returned at top level
+                intents = data
+            elif "intents" in data and isinstance(data["intents"], list):
                 intents = data["intents"]
             elif "action" in data:
                 # Single intent returned at top level
                 intents = [data]
-            elif isinstance(data, list):
-                # List of intents returned at top level
-                intents = data
             else:
                 return {"error": "Invalid JSON structure: missing 'intents' or intent fields", "raw": text}
 
             # Validate each intent
-            required = ["action", "resource_type", "target_field"]
             for intent in intents:
-                for field in required:
-                    if field not in intent:
-                        intent[field] = "unknown"
+                self._fill_required(intent)
             
             return {"intents": intents}
             
-        except (json.JSONDecodeError, Exception) as e:
+        except Exception as e:
             logger.error(f"Failed to parse AI response: {e} - Raw text: {text[:200]}")
             return {"error": f"Invalid JSON response from AI: {e}", "raw": text[:200]}
     
+    def _fill_required(self, intent: Dict[str, Any]):
+        """Mark missing required fields as "unknown" so PatchGenerator rejects them."""
+        for field in _REQUIRED_FIELDS:
+            if field not in intent:
+                intent[field] = "unknown"
+    
+    def _extract_json(self, text: str) -> Optional[Dict[str, Any]]:
+        """Dig a JSON object out of a response wrapped in markdown or prose."""
+        # Remove markdown markers if present
+        text = _FENCE_RE.sub("", text)
+        text = text.replace("```", "").strip()
+        
+        # Strip trailing commas once, then decode from each '{' until one yields an object
+        text = _TRAIL_COMMA_RE.sub(r'\1', text)
+        
+        start_idx = text.find('{')
+        while start_idx != -1:
+            try:
+                obj, end_pos = _DECODER.raw_decode(text, start_idx)
+                if isinstance(obj, dict):
+                    return obj
+            except ValueError:
+                pass
+            start_idx = text.find('{', start_idx + 1)
+        
+        return None
+    
     def _fallback_parse(self, request: str) -> Dict[str, Any]:
         """Basic keyword-based parsing when AI is unavailable."""
         request_lower = request.lower()
         
+        # Detect action, resource type and common targets in a single scan
+        found = set(_FALLBACK_KEYWORD_RE.findall(request_lower))
+        return self._fallback_intent(request, request_lower, found)
+    
+    def _fallback_parse_batch(self, requests: List[str]) -> List[Dict[str, Any]]:
+        """
+        _fallback_parse for several requests, with one keyword scan over all of them.
+        
+        Args:
+            requests: List of natural language requests
+        
+        Returns:
+            List of intents, in the same order as requests
+        """
+        lowered = [r.lower() for r in requests]
+        
+        # No keyword contains a newline, so every match lies within one request
+        buffer = "\n".join(lowered)
+        starts = list(itertools.accumulate((len(r) + 1 for r in lowered[:-1]), initial=0))
+        found = [set() for _ in requests]
+        for match in _FALLBACK_KEYWORD_RE.finditer(buffer):
+            found[bisect.bisect_right(starts, match.start()) - 1].add(match.group())
+        
+        return [
+            self._fallback_intent(request, request_lower, request_found)
+            for request, request_lower, request_found in zip(requests, lowered, found)
+        ]
+    
+    def _fallback_intent(self, request: str, request_lower: str, found: set) -> Dict[str, Any]:
+        """Build a fallback intent from the keywords found in a request."""
         intent = {
-            "action": "add",
-            "resource_type": "deployments",
-            "target_field": "unknown",
+            "action": _match_keyword(found, _FALLBACK_ACTIONS, "add"),
+            "resource_type": _match_keyword(found, _FALLBACK_RESOURCES, "deployments"),
+            "target_field": _match_keyword(found, _FALLBACK_TARGETS, "unknown"),
             "value": None,
             "namespace": None,
             "description": request
         }
         
-        # Detect resource type
-        if "service" in request_lower:
-            intent["resource_type"] = "services"
-        elif "pod" in request_lower:
-            intent["resource_type"] = "pods"
-        elif "configmap" in request_lower:
-            intent["resource_type"] = "configmaps"
-        
-        # Detect action
-        if "remove" in request_lower or "delete" in request_lower:
-            intent["action"] = "remove"
-        elif "update" in request_lower or "change" in request_lower:
-            intent["action"] = "update"
-        
-        # Detect common targets
-        if "memory" in request_lower:
-            intent["target_field"] = "resources.limits.memory"
-        elif "cpu" in request_lower:
-            intent["target_field"] = "resources.limits.cpu"
-        elif "image" in request_lower:
-            intent["target_field"] = "image"
-        elif "label" in request_lower:
-            intent["target_field"] = "labels"
-        elif "annotation" in request_lower:
-            intent["target_field"] = "annotations"
-        
         # Detect namespace
-        if " in " in request_lower:
-            parts = request_lower.split(" in ")
-            if len(parts) > 1:
-                ns = parts[-1].split()[0]
-                if ns not in ["all", "every"]:
-                    intent["namespace"] = ns
+        match = _FALLBACK_NAMESPACE_RE.match(request_lower)
+        if match and match.group(1) not in ("all", "every"):
+            intent["namespace"] = match.group(1)
         
         return intent
+
+
+@functools.lru_cache(maxsize=1)
+def get_intent_parser() -> IntentParser:
+    """Process-wide IntentParser, shared by the API server and scripts."""
+    return IntentParser()
@@ -2,56 +2,178 @@
 Patch Generator - Creates Kustomize patches from intents.
 """
 
+import os
 import logging
-from typing import Dict, Any, List
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Type
 import yaml
 
-from transformers.factory import get_transformer
+from transformers.base import BaseTransformer, classify_target_field
+from transformers.factory import get_transformer, get_transformer_class
+
+# Prefer the LibYAML C emitter; fall back to the pure-Python one
+try:
+    from yaml import CSafeDumper as _BaseDumper
+except ImportError:
+    from yaml import SafeDumper as _BaseDumper
 
 logger = logging.getLogger(__name__)
 
 
+class _Dumper(_BaseDumper):
+    """Dumper for patches: plain trees, so no anchor/alias bookkeeping."""
+
+    def ignore_aliases(self, data):
+        # Shared sub-dicts (e.g. one probe used for every container) are
+        # written out in full instead of as &id001 anchors
+        return True
+
+# Renders patches in insertion order; also used for merged patches in main.py
+dump_yaml = functools.partial(yaml.dump, Dumper=_Dumper, default_flow_style=False, sort_keys=False)
+
+
 class PatchGenerator:
     """Generates Kustomize strategic merge patches."""
     
-    def generate(self, intent: Dict[str, Any], resources: List[Dict]) -> List[Dict]:
+    def __init__(self):
+        # Transformers and the YAML emitter mostly hold the GIL, so threads only
+        # pay off on free-threaded builds; 1 keeps generation sequential.
+        self.max_workers = int(os.getenv("PATCH_WORKERS", "1"))
+        self._pool = None
+    
+    def close(self):
+        """Shut down the worker pool, if PATCH_WORKERS > 1 started one."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def generate(
+        self,
+        intent: Dict[str, Any],
+        resources: Iterable[Dict],
+        *,
+        include_preview: bool = True
+    ) -> List[Dict]:
         """
         Generate patches for all matching resources.
         
         Args:
             intent: Parsed intent from IntentParser
-            resources: List of Kubernetes resources to patch
+            resources: Kubernetes resources to patch; a generator such as
+                ClusterScanner.iter_scan() is consumed as it goes
+            include_preview: Render the "yaml" and "diff" strings; when False
+                both are None (e.g. patches that are only applied)
+        
+        Returns:
+            List of patch dictionaries
+        """
+        if not self._valid_intent(intent):
+            return []
+        
+        # Same intent for every resource, so resolve the handler key once
+        field = classify_target_field(intent.get("target_field") or "")
+        
+        one_patch = functools.partial(
+            self._one_patch, intent=intent, field=field, include_preview=include_preview
+        )
+        return [p for p in self._map(one_patch, resources) if p is not None]
+    
+    def generate_batch(
+        self,
+        intent: Dict[str, Any],
+        resources: List[Dict],
+        *,
+        include_preview: bool = True
+    ) -> List[Dict]:
+        """
+        Generate patches like generate(), resolving the transformer once per kind.
+        
+        Resources are grouped by kind (in order of first appearance), so the
+        patches come back grouped the same way rather than in input order.
+        
+        Args:
+            intent: Parsed intent from IntentParser
+            resources: Kubernetes resources to patch, possibly of mixed kinds
+            include_preview: Render the "yaml" and "diff" strings
         
         Returns:
             List of patch dictionaries
         """
+        if not self._valid_intent(intent):
+            return []
+        
+        by_kind: Dict[Optional[str], List[Dict]] = {}
+        for resource in resources:
+            by_kind.setdefault(resource.get("kind"), []).append(resource)
+        
+        field = classify_target_field(intent.get("target_field") or "")
+        
         patches = []
-
-        # Validate intent
+        for kind, group in by_kind.items():
+            one_patch = functools.partial(
+                self._one_patch,
+                intent=intent,
+                field=field,
+                include_preview=include_preview,
+                transformer_cls=get_transformer_class(kind)
+            )
+            patches.extend(p for p in self._map(one_patch, group) if p is not None)
+        
+        return patches
+    
+    def _valid_intent(self, intent: Dict[str, Any]) -> bool:
+        """Check the intent has the fields every transformer needs."""
         required_fields = ["action", "resource_type", "target_field"]
         if any(intent.get(field) == "unknown" or field not in intent for field in required_fields):
-            logger.error(f"Invalid intent: Missing one of {required_fields}. Intent: {intent}")
-            return patches
-        
-        for resource in resources:
-            try:
-                transformer = get_transformer(resource, intent)
-                patch = transformer.transform()
+            logger.error("Invalid intent: Missing one of %s. Intent: %s", required_fields, intent)
+            return False
+        return True
+    
+    def _map(self, fn, resources: Iterable[Dict]):
+        """Map fn over resources, on the worker pool when PATCH_WORKERS > 1."""
+        if self.max_workers > 1 and not (isinstance(resources, list) and len(resources) <= 1):
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._pool.map(fn, resources)
+        return map(fn, resources)
+    
+    def _one_patch(
+        self,
+        resource: Dict,
+        intent: Dict[str, Any],
+        field: str,
+        include_preview: bool,
+        transformer_cls: Optional[Type[BaseTransformer]] = None
+    ) -> Optional[Dict]:
+        """Build the patch entry for a single resource, or None if nothing changes."""
+        try:
+            if transformer_cls is None:
+                transformer = get_transformer(resource, intent, field)
+            else:
+                transformer = transformer_cls(resource, intent, field)
+            patch = transformer.transform()
+            
+            if patch:
+                return {
+                    "name": f"{resource['kind'].lower()}-{resource['metadata']['name']}",
+                    "namespace": resource['metadata'].get('namespace', 'default'),
+                    "kind": resource['kind'],
+                    "patch": patch,
+                    "diff": self._generate_diff(resource, patch) if include_preview else None,
+                    "yaml": dump_yaml(patch) if include_preview else None
+                }
                 
-                if patch:
-                    patches.append({
-                        "name": f"{resource['kind'].lower()}-{resource['metadata']['name']}",
-                        "namespace": resource['metadata'].get('namespace', 'default'),
-                        "kind": resource['kind'],
-                        "patch": patch,
-                        "diff": self._generate_diff(resource, patch),
-                        "yaml": yaml.dump(patch, default_flow_style=False)
-                    })
-                    
-            except Exception as e:
-                logger.error(f"Failed to generate patch for {resource.get('metadata', {}).get('name')}: {e}")
+        except Exception as e:
+            logger.error("Failed to generate patch for %s: %s", resource.get('metadata', {}).get('name'), e)
         
-        return patches
+        return None
     
     def _generate_diff(self, original: Dict, patch: Dict) -> str:
         """Generate a human-readable diff."""
@@ -60,6 +182,6 @@ class PatchGenerator:
         lines.append(f"Namespace: {original['metadata'].get('namespace', 'default')}")
         lines.append("")
         lines.append("Changes:")
-        lines.append(yaml.dump(patch.get("spec", patch.get("metadata", {})), default_flow_style=False))
+        lines.append(dump_yaml(patch.get("spec", patch.get("metadata", {}))))
         
         return "\n".join(lines)
@@ -0,0 +1,63 @@
+"""
+Patch Merge - Combines patches from several intents for the same resource.
+
+Self-contained and fully annotated so setup.py can compile it with mypyc
+(AI_KUSTOMIZE_MYPYC=1); otherwise the pure-Python module is used.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+# Sentinel for "key absent" (None is a valid value)
+_MISSING: Any = object()
+
+# List fields merged element-wise by container name
+_CONTAINER_LISTS = ("containers", "initContainers")
+
+
+def deep_merge(base: Dict[str, Any], extra: Dict[str, Any]) -> None:
+    """
+    Deep merge extra into base, in place.
+
+    Walks the nesting with a FIFO queue instead of recursion; nested merges
+    are applied in the same order a recursive merge would apply them.
+    """
+    pending: Deque[Tuple[Dict[str, Any], Dict[str, Any]]] = deque([(base, extra)])
+    while pending:
+        target, source = pending.popleft()
+        for k, v in source.items():
+            current = target.get(k, _MISSING)
+            if type(v) is dict and isinstance(current, dict):
+                pending.append((current, v))
+            elif type(v) is list and isinstance(current, list):
+                # For lists (like containers), merge by name if possible
+                if k in _CONTAINER_LISTS:
+                    pending.extend(merge_containers(current, v))
+                else:
+                    # Fallback: extend if not already present
+                    for item in v:
+                        if item not in current:
+                            current.append(item)
+            else:
+                target[k] = v
+
+
+def merge_containers(
+    base_list: List[Dict[str, Any]],
+    extra_list: List[Dict[str, Any]]
+) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Merge container lists by name.
+
+    New containers are appended to base_list; returns the (base, extra)
+    pairs of same-named containers that still need a deep merge.
+    """
+    base_map = {c["name"]: c for c in base_list}
+    to_merge: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+    for extra_c in extra_list:
+        name = extra_c.get("name")
+        if name in base_map:
+            to_merge.append((base_map[name], extra_c))
+        else:
+            base_list.append(extra_c)
+    return to_merge
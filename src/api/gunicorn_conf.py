@@ -0,0 +1,18 @@
+"""
+Gunicorn settings for serving the API with several Uvicorn workers.
+
+    cd src && gunicorn -c api/gunicorn_conf.py api.server:app
+"""
+
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# Each worker runs its own event loop; WEB_CONCURRENCY overrides the count
+workers = int(os.getenv("WEB_CONCURRENCY", str(max(2, (os.cpu_count() or 1) * 2 + 1))))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master and fork. Safe because server.py builds the
+# AI clients and the (not fork-safe) Kubernetes client lazily, per worker, on
+# first request.
+preload_app = True
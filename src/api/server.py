@@ -4,59 +4,88 @@ Exposes the agent's capabilities as a REST API for the Web UI.
 """
 
 import os
-import sys
+import json
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+import functools
+import contextlib
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable, Literal, Annotated, Union
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi.responses import RedirectResponse, FileResponse, StreamingResponse
 from pydantic import BaseModel
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from dotenv import load_dotenv
 load_dotenv()
 
-from agents.intent_parser import IntentParser
+from agents.intent_parser import IntentParser, AI_PROVIDER, get_intent_parser
 from agents.patch_generator import PatchGenerator
 from scanners.cluster_scanner import ClusterScanner
-from outputs.kustomize import KustomizeGenerator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # The parser's async AI client holds connections bound to this event loop
+    if get_intent_parser.cache_info().currsize:
+        await get_intent_parser().aclose()
+    if get_patch_generator.cache_info().currsize:
+        get_patch_generator().close()
+
+
 # Initialize FastAPI
 app = FastAPI(
     title="AI Kustomize Agent API",
     description="Natural language to Kubernetes patches",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# CORS - allow frontend
+# CORS - allow frontend. In production the UI is proxied under /api (same
+# origin), so only the dev servers need listing; CORS_ORIGINS overrides.
+CORS_ORIGINS = [
+    o.strip()
+    for o in os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
+    if o.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, restrict this
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Initialize components
-intent_parser = IntentParser()
-patch_generator = PatchGenerator()
-kustomize_gen = KustomizeGenerator()
+# === Components ===
+# Built on first use and shared by all requests, so importing the app (or
+# forking workers) doesn't pay for AI client setup or kubeconfig loading.
+# get_intent_parser lives in agents.intent_parser so scripts share it too.
 
-try:
-    scanner = ClusterScanner()
-    cluster_connected = True
-except Exception as e:
-    logger.warning(f"Could not connect to cluster: {e}")
-    scanner = None
-    cluster_connected = False
+@functools.lru_cache(maxsize=1)
+def get_patch_generator() -> PatchGenerator:
+    return PatchGenerator()
+
+
+@functools.lru_cache(maxsize=1)
+def get_scanner() -> Optional[ClusterScanner]:
+    """Cluster scanner, or None if the cluster is unreachable."""
+    try:
+        return ClusterScanner(
+            lite=True,
+            watch_cache=os.getenv("KUBE_WATCH_CACHE", "false").lower() == "true",
+            # Repeated commands against a long-lived process reuse recent scans
+            scan_cache_ttl=float(os.getenv("KUBE_SCAN_CACHE_TTL", "30"))
+        )
+    except Exception as e:
+        logger.warning(f"Could not connect to cluster: {e}")
+        return None
 
 
 # === Request/Response Models ===
@@ -75,11 +104,19 @@ class PatchPreview(BaseModel):
     diff: str
 
 
+class JsonPatchPreview(BaseModel):
+    """Patch preview for ?format=json: the patch object instead of yaml/diff."""
+    name: str
+    kind: str
+    namespace: str
+    patch: Dict[str, Any]
+
+
 class CommandResponse(BaseModel):
     status: str
     message: Optional[str] = None
     intents: Optional[List[Dict[str, Any]]] = None
-    patches: Optional[List[PatchPreview]] = None
+    patches: Optional[List[Union[PatchPreview, JsonPatchPreview]]] = None
     patches_count: int = 0
 
 
@@ -97,200 +134,62 @@ class ResourceResponse(BaseModel):
     resources: List[Dict[str, Any]]
 
 
-# === Landing Page HTML ===
-LANDING_PAGE_HTML = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AI Kustomize Agent</title>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: 'Inter', sans-serif;
-            background: linear-gradient(135deg, #0d0d1a 0%, #1a1a35 100%);
-            color: #f8fafc;
-            min-height: 100vh;
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            padding: 2rem;
-        }
-        .container { max-width: 900px; width: 100%; }
-        .header { text-align: center; margin-bottom: 3rem; }
-        .header h1 {
-            font-size: 2.5rem;
-            background: linear-gradient(135deg, #6366f1, #22d3ee);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            margin-bottom: 0.5rem;
-        }
-        .header p { color: #94a3b8; font-size: 1.1rem; }
-        .status-bar { display: flex; justify-content: center; gap: 2rem; margin-bottom: 2rem; }
-        .status-item {
-            display: flex; align-items: center; gap: 0.5rem;
-            background: rgba(30, 30, 60, 0.6);
-            padding: 0.75rem 1.25rem; border-radius: 12px;
-            border: 1px solid rgba(100, 100, 150, 0.2);
-        }
-        .status-dot { width: 10px; height: 10px; border-radius: 50%; background: #22c55e; }
-        .card {
-            background: rgba(30, 30, 60, 0.6);
-            border: 1px solid rgba(100, 100, 150, 0.2);
-            border-radius: 16px; padding: 2rem; margin-bottom: 1.5rem;
-            backdrop-filter: blur(20px);
-        }
-        .card h2 { font-size: 1.25rem; margin-bottom: 1rem; display: flex; align-items: center; gap: 0.5rem; }
-        .form-group { margin-bottom: 1rem; }
-        .form-group label { display: block; margin-bottom: 0.5rem; color: #94a3b8; }
-        input, select, textarea {
-            width: 100%; background: #151528;
-            border: 1px solid rgba(100, 100, 150, 0.3);
-            border-radius: 10px; padding: 0.875rem 1rem;
-            color: #f8fafc; font-size: 1rem; font-family: inherit;
-        }
-        input:focus, select:focus, textarea:focus {
-            outline: none; border-color: #6366f1;
-            box-shadow: 0 0 20px rgba(99, 102, 241, 0.3);
-        }
-        .btn {
-            background: linear-gradient(135deg, #6366f1, #22d3ee);
-            color: white; border: none; padding: 1rem 2rem;
-            border-radius: 12px; font-weight: 600; cursor: pointer;
-            font-size: 1rem; transition: all 0.2s;
-        }
-        .btn:hover { transform: translateY(-2px); box-shadow: 0 10px 30px rgba(99, 102, 241, 0.4); }
-        .btn-secondary { background: transparent; border: 1px solid #6366f1; color: #6366f1; }
-        .btn-row { display: flex; gap: 1rem; margin-top: 1rem; }
-        .result {
-            background: #0d0d1a; border-radius: 10px; padding: 1rem;
-            margin-top: 1rem; font-family: monospace; font-size: 0.85rem;
-            white-space: pre-wrap; max-height: 400px; overflow-y: auto; display: none;
-        }
-        .links { display: flex; gap: 1rem; justify-content: center; margin-top: 2rem; }
-        .links a {
-            color: #6366f1; text-decoration: none; padding: 0.5rem 1rem;
-            border: 1px solid #6366f1; border-radius: 8px; transition: all 0.2s;
-        }
-        .links a:hover { background: #6366f1; color: white; }
-        .examples { margin-top: 1rem; color: #64748b; font-size: 0.9rem; }
-        .examples code { background: #1a1a35; padding: 0.25rem 0.5rem; border-radius: 4px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🔧 AI Kustomize Agent</h1>
-            <p>Natural language to Kubernetes patches</p>
-        </div>
-        <div class="status-bar">
-            <div class="status-item">
-                <div class="status-dot" id="clusterDot"></div>
-                <span id="clusterStatus">Checking...</span>
-            </div>
-            <div class="status-item">
-                <span>🤖 AI:</span>
-                <span id="aiProvider">-</span>
-            </div>
-        </div>
-        <div class="card">
-            <h2>💬 Send a Command</h2>
-            <div class="form-group">
-                <label>Namespace (optional)</label>
-                <input type="text" id="namespace" placeholder="e.g., agent-test">
-            </div>
-            <div class="form-group">
-                <label>Command</label>
-                <textarea id="command" rows="3" placeholder="Describe what you want to change..."></textarea>
-            </div>
-            <div class="examples">
-                Examples: <code>Add label env=prod to all deployments</code> | 
-                <code>Set memory limit 512Mi for my-nginx</code>
-            </div>
-            <div class="btn-row">
-                <button class="btn" onclick="sendCommand(true)">👀 Preview</button>
-                <button class="btn btn-secondary" onclick="sendCommand(false)">🚀 Apply</button>
-            </div>
-            <pre class="result" id="result"></pre>
-        </div>
-        <div class="links">
-            <a href="/docs">📖 API Docs</a>
-            <a href="/health">❤️ Health</a>
-            <a href="/namespaces">📁 Namespaces</a>
-        </div>
-    </div>
-    <script>
-        fetch('/health').then(r => r.json()).then(data => {
-            document.getElementById('clusterStatus').textContent = data.cluster_connected ? 'Connected' : 'Disconnected';
-            document.getElementById('clusterDot').style.background = data.cluster_connected ? '#22c55e' : '#ef4444';
-            document.getElementById('aiProvider').textContent = data.ai_provider;
-        });
-        function sendCommand(dryRun) {
-            const command = document.getElementById('command').value;
-            const namespace = document.getElementById('namespace').value;
-            const resultEl = document.getElementById('result');
-            if (!command) { alert('Please enter a command'); return; }
-            resultEl.style.display = 'block';
-            resultEl.textContent = 'Processing...';
-            fetch('/command', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ command, namespace: namespace || null, dry_run: dryRun })
-            }).then(r => r.json()).then(data => {
-                let output = 'Status: ' + data.status + '\\nMessage: ' + data.message + '\\n\\n';
-                if (data.patches && data.patches.length > 0) {
-                    output += 'Patches:\\n';
-                    data.patches.forEach(p => { output += '\\n--- ' + p.kind + '/' + p.name + ' ---\\n' + p.yaml + '\\n'; });
-                }
-                resultEl.textContent = output;
-            }).catch(err => { resultEl.textContent = 'Error: ' + err.message; });
-        }
-    </script>
-</body>
-</html>
-"""
+# Build validators at import time so the first request doesn't pay for it
+for _model in (CommandRequest, PatchPreview, JsonPatchPreview, CommandResponse,
+               HealthResponse, NamespaceResponse, ResourceResponse):
+    _model.model_rebuild()
+
+
+# === Landing Page ===
+STATIC_DIR = Path(__file__).parent / "static"
 
 # === API Endpoints ===
 
-@app.get("/", response_class=HTMLResponse, include_in_schema=False)
+@app.get("/", response_class=FileResponse, include_in_schema=False)
 async def root():
     """Serve the landing page."""
-    return LANDING_PAGE_HTML
+    return FileResponse(
+        STATIC_DIR / "index.html",
+        headers={"Cache-Control": "public, max-age=300"}
+    )
 
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(scanner: Optional[ClusterScanner] = Depends(get_scanner)):
     """Health check endpoint."""
     return HealthResponse(
         status="healthy",
-        cluster_connected=cluster_connected,
-        ai_provider=os.getenv("AI_PROVIDER", "azure")
+        cluster_connected=scanner is not None,
+        ai_provider=AI_PROVIDER
     )
 
 
 @app.get("/namespaces", response_model=NamespaceResponse)
-async def list_namespaces():
+async def list_namespaces(scanner: Optional[ClusterScanner] = Depends(get_scanner)):
     """List all namespaces in the cluster."""
     if not scanner:
         raise HTTPException(status_code=503, detail="Cluster not connected")
     
     try:
-        namespaces = scanner.list_namespaces()
+        namespaces = await run_in_threadpool(scanner.list_namespaces)
         return NamespaceResponse(namespaces=namespaces)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/resources/{namespace}", response_model=ResourceResponse)
-async def list_resources(namespace: str, resource_type: str = "deployments"):
+async def list_resources(
+    namespace: str,
+    resource_type: str = "deployments",
+    scanner: Optional[ClusterScanner] = Depends(get_scanner)
+):
     """List resources in a namespace."""
     if not scanner:
         raise HTTPException(status_code=503, detail="Cluster not connected")
     
     try:
-        resources = scanner.scan(
+        resources = await run_in_threadpool(
+            scanner.scan,
             resource_type=resource_type,
             namespace=namespace
         )
@@ -309,16 +208,61 @@ async def list_resources(namespace: str, resource_type: str = "deployments"):
 
 
 @app.post("/command", response_model=CommandResponse)
-async def execute_command(request: CommandRequest):
+async def execute_command(
+    request: CommandRequest,
+    intent_parser: IntentParser = Depends(get_intent_parser),
+    patch_generator: PatchGenerator = Depends(get_patch_generator),
+    scanner: Optional[ClusterScanner] = Depends(get_scanner),
+    stream: bool = False,
+    preview_format: Annotated[Literal["yaml", "json"], Query(alias="format")] = "yaml"
+):
     """
     Execute a natural language command.
     Returns patch previews (dry_run=True) or applies them (dry_run=False).
+    With ?stream=true intents and patches are sent as NDJSON while they are
+    generated; each intent is scanned as soon as the AI has produced it.
+    With ?format=json each patch is returned as an object instead of
+    rendered YAML and diff text, which skips YAML generation entirely.
     """
     logger.info(f"📝 Processing command: {request.command}")
     
+    def scan_and_generate(intent: Dict[str, Any]) -> List[Dict]:
+        try:
+            resources = scanner.scan(
+                resource_type=intent.get("resource_type", "deployments"),
+                namespace=request.namespace or intent.get("namespace"),
+                labels=intent.get("label_selector")
+            )
+            
+            if resources:
+                return patch_generator.generate(
+                    intent, resources, include_preview=preview_format == "yaml"
+                )
+        except Exception as e:
+            logger.error(f"Patch generation failed for intent: {e}")
+        return []
+    
+    if stream:
+        if not scanner:
+            return CommandResponse(
+                status="error",
+                message="Cluster not connected"
+            )
+        return StreamingResponse(
+            _stream_command(
+                request,
+                intent_parser.astream_intents(request.command),
+                scan_and_generate,
+                scanner,
+                preview_format
+            ),
+            media_type="application/x-ndjson"
+        )
+    
     # Step 1: Parse intent with AI
     try:
-        intent_data = intent_parser.parse(request.command)
+        # Native async client call; doesn't tie up a worker thread while the AI responds
+        intent_data = await intent_parser.aparse(request.command)
         
         if intent_data.get("error"):
             return CommandResponse(
@@ -343,66 +287,160 @@ async def execute_command(request: CommandRequest):
             message="Cluster not connected"
         )
     
-    all_patches = []
-    for intent in intents:
-        try:
-            resources = scanner.scan(
-                resource_type=intent.get("resource_type", "deployments"),
-                namespace=request.namespace or intent.get("namespace"),
-                labels=intent.get("label_selector")
-            )
-            
-            if resources:
-                patches = patch_generator.generate(intent, resources)
-                all_patches.extend(patches)
-        except Exception as e:
-            logger.error(f"Patch generation failed for intent: {e}")
+    # Scans are blocking Kubernetes API calls; run them in the threadpool so the
+    # event loop keeps serving other requests, one task per intent
+    tasks = [
+        asyncio.ensure_future(run_in_threadpool(scan_and_generate, intent))
+        for intent in intents
+    ]
+    
+    per_intent = await asyncio.gather(*tasks)
+    all_patches = [p for patches in per_intent for p in patches]
     
     if not all_patches:
         return CommandResponse(
             status="warning",
             message="No patches generated",
-            intents=[dict(i) for i in intents]
+            intents=intents
         )
     
     # Step 3: Apply if not dry run
     if not request.dry_run:
-        for patch in all_patches:
-            try:
-                scanner.apply_patch(patch)
-                logger.info(f"✅ Applied: {patch['name']}")
-            except Exception as e:
-                logger.error(f"❌ Failed to apply {patch['name']}: {e}")
+        await _apply_all(scanner, all_patches)
     
     # Build response
+    preview_model = JsonPatchPreview if preview_format == "json" else PatchPreview
     patch_previews = [
-        PatchPreview(
-            name=p["name"],
-            kind=p["kind"],
-            namespace=p["namespace"],
-            yaml=p["yaml"],
-            diff=p.get("diff", "")
-        )
+        preview_model(**_preview_fields(p, preview_format))
         for p in all_patches
     ]
     
     return CommandResponse(
         status="applied" if not request.dry_run else "preview",
         message=f"{'Applied' if not request.dry_run else 'Generated'} {len(all_patches)} patches",
-        intents=[dict(i) for i in intents],
+        intents=intents,
         patches=patch_previews,
         patches_count=len(all_patches)
     )
 
 
+async def _apply_all(scanner: ClusterScanner, patches: List[Dict]):
+    """Apply patches to the cluster and log each outcome."""
+    try:
+        statuses = await run_in_threadpool(scanner.apply_patches, patches)
+    except Exception as e:
+        logger.error(f"❌ Failed to apply patches: {e}")
+        statuses = [{"name": p["name"], "applied": False, "error": str(e)} for p in patches]
+    
+    for status in statuses:
+        if status["applied"]:
+            logger.info(f"✅ Applied: {status['name']}")
+        else:
+            logger.error(f"❌ Failed to apply {status['name']}: {status['error']}")
+
+
+def _preview_fields(patch: Dict, preview_format: str) -> Dict[str, Any]:
+    """PatchPreview/JsonPatchPreview fields for a generated patch in the requested format."""
+    fields = {"name": patch["name"], "kind": patch["kind"], "namespace": patch["namespace"]}
+    if preview_format == "json":
+        fields["patch"] = patch["patch"]
+    else:
+        fields["yaml"] = patch["yaml"]
+        fields["diff"] = patch.get("diff", "")
+    return fields
+
+
+# orjson is optional; it encodes streamed patch records faster than json
+try:
+    import orjson
+    
+    def _ndjson(record: Dict[str, Any]) -> bytes:
+        return orjson.dumps(record) + b"\n"
+except ImportError:
+    def _ndjson(record: Dict[str, Any]) -> bytes:
+        return json.dumps(record).encode() + b"\n"
+
+
+async def _stream_command(
+    request: CommandRequest,
+    intent_stream: AsyncIterator[Dict[str, Any]],
+    scan_and_generate: Callable[[Dict[str, Any]], List[Dict]],
+    scanner: ClusterScanner,
+    preview_format: str = "yaml"
+) -> AsyncIterator[bytes]:
+    """
+    NDJSON body for /command?stream=true.
+    
+    Emits an "intent" record for each intent as the AI produces it (its scan
+    starts right away), then a "patch" record (PatchPreview fields) as soon
+    as each intent's patches are ready, and finally a "done" record with the
+    status, message and patches_count of the non-streaming response. If intent
+    parsing fails, nothing is applied and only an error "done" record follows.
+    """
+    tasks = []
+    async for intent in intent_stream:
+        if "error" in intent:
+            for task in tasks:
+                task.cancel()
+            yield _ndjson({
+                "type": "done",
+                "status": "error",
+                "message": f"Failed to parse intent: {intent['error']}",
+                "patches_count": 0
+            })
+            return
+        
+        tasks.append(asyncio.ensure_future(run_in_threadpool(scan_and_generate, intent)))
+        yield _ndjson({"type": "intent", "intent": intent})
+    
+    all_patches = []
+    for next_done in asyncio.as_completed(tasks):
+        patches = await next_done
+        all_patches.extend(patches)
+        for p in patches:
+            yield _ndjson({"type": "patch", **_preview_fields(p, preview_format)})
+    
+    if not tasks:
+        status, message = "warning", "No intents found in request"
+    elif not all_patches:
+        status, message = "warning", "No patches generated"
+    elif not request.dry_run:
+        await _apply_all(scanner, all_patches)
+        status, message = "applied", f"Applied {len(all_patches)} patches"
+    else:
+        status, message = "preview", f"Generated {len(all_patches)} patches"
+    
+    yield _ndjson({
+        "type": "done",
+        "status": status,
+        "message": message,
+        "patches_count": len(all_patches)
+    })
+
+
 @app.post("/apply")
-async def apply_patches(request: CommandRequest):
+async def apply_patches(
+    request: CommandRequest,
+    intent_parser: IntentParser = Depends(get_intent_parser),
+    patch_generator: PatchGenerator = Depends(get_patch_generator),
+    scanner: Optional[ClusterScanner] = Depends(get_scanner)
+):
     """Shortcut to apply patches directly."""
     request.dry_run = False
-    return await execute_command(request)
+    return await execute_command(request, intent_parser, patch_generator, scanner, stream=False)
 
 
 # === Run Server ===
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # One event loop per worker process; multiple workers need the import string
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run(
+        "api.server:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=8000,
+        workers=workers,
+        # uvloop and httptools ship with uvicorn[standard]; asyncio/h11 without them
+        loop="auto",
+        http="auto"
+    )
@@ -4,22 +4,15 @@ AI Kustomize Agent - CLI Entry Point
 Natural language to Kustomize patches for bulk K8s modifications.
 """
 
-import os
 import sys
 import argparse
 import logging
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from dotenv import load_dotenv
 
-from agents.intent_parser import IntentParser
-from agents.patch_generator import PatchGenerator
-from scanners.cluster_scanner import ClusterScanner
-from scanners.manifest_scanner import ManifestScanner
-from outputs.kustomize import KustomizeGenerator
-from outputs.diff import DiffPreview
-import yaml
+from agents.patch_merge import deep_merge
 
 # Load environment variables
 load_dotenv()
@@ -43,13 +36,22 @@ class AIKustomizeAgent:
         context: Optional[str] = None,
         namespace: Optional[str] = None,
         dry_run: bool = True,
-        yes: bool = False
+        yes: bool = False,
+        jobs: int = 4
     ):
         self.mode = mode
         self.manifest_path = manifest_path
         self.namespace = namespace
         self.dry_run = dry_run
         self.yes = yes
+        self.jobs = max(1, jobs)
+        
+        # Imported here rather than at module level so --help and argument
+        # errors don't load the AI SDK clients, yaml and the transformers
+        from agents.intent_parser import IntentParser
+        from agents.patch_generator import PatchGenerator
+        from outputs.kustomize import KustomizeGenerator
+        from outputs.diff import DiffPreview
         
         # Initialize components
         self.intent_parser = IntentParser()
@@ -57,15 +59,24 @@ class AIKustomizeAgent:
         self.kustomize_gen = KustomizeGenerator()
         self.diff_preview = DiffPreview()
         
-        # Initialize scanner based on mode
+        # Initialize scanner based on mode (imported here so file mode never loads the kubernetes SDK)
         if mode == "cluster":
+            from scanners.cluster_scanner import ClusterScanner
             self.scanner = ClusterScanner(
                 kubeconfig=kubeconfig,
-                context=context
+                context=context,
+                lite=True
             )
         else:
+            from scanners.manifest_scanner import ManifestScanner
             self.scanner = ManifestScanner(path=manifest_path)
     
+    def close(self):
+        """Release worker threads and cluster connections."""
+        self.patch_generator.close()
+        if hasattr(self.scanner, "close"):
+            self.scanner.close()
+    
     def run(self, user_request: str, export_path: Optional[str] = None) -> dict:
         """Execute the full workflow."""
         logger.info(f"📝 Processing request: {user_request}")
@@ -83,24 +94,24 @@ class AIKustomizeAgent:
 
         # Collect all patches across all intents
         all_resource_patches = {} # key: (kind, name, namespace), value: merged_patch_dict
+        merged_keys = set()  # resources patched by more than one intent
+        
+        # YAML previews are only shown for dry runs and exports
+        include_preview = self.dry_run or bool(export_path)
 
-        for intent in intents:
-            logger.info(f"   Action: {intent.get('action')} on {intent.get('target_field')}")
-            
-            # Step 2: Scan resources for this intent
-            resources = self.scanner.scan(
-                resource_type=intent.get("resource_type", "deployments"),
-                namespace=self.namespace or intent.get("namespace"),
-                labels=intent.get("label_selector")
-            )
-            
-            if not resources:
-                logger.warning(f"      No matching resources found for {intent.get('target_field')}")
-                continue
-            
-            # Step 3: Generate patches for this intent
-            intent_patches = self.patch_generator.generate(intent, resources)
-            
+        # Steps 2-3: scan and generate per intent. Scans are I/O-bound, so run
+        # intents concurrently; map() keeps results in intent order so merges
+        # below stay deterministic.
+        def process(intent):
+            return self._process_intent(intent, include_preview)
+        
+        if self.jobs > 1 and len(intents) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.jobs, len(intents))) as pool:
+                per_intent = list(pool.map(process, intents))
+        else:
+            per_intent = [process(intent) for intent in intents]
+
+        for intent_patches in per_intent:
             # Step 4: Merge patches for the same resource
             for p in intent_patches:
                 key = (p['kind'], p['name'], p['namespace'])
@@ -110,10 +121,16 @@ class AIKustomizeAgent:
                 else:
                     logger.debug(f"      Merging patch for {key}")
                     # Deep merge patch data
-                    self._deep_merge(all_resource_patches[key]['patch'], p['patch'])
-                    # Update yaml
-                    all_resource_patches[key]['yaml'] = yaml.dump(all_resource_patches[key]['patch'], default_flow_style=False)
-                    logger.debug(f"      Merged patch: {all_resource_patches[key]['yaml']}")
+                    deep_merge(all_resource_patches[key]['patch'], p['patch'])
+                    merged_keys.add(key)
+
+        # Re-render merged patches once, after every intent has been merged in
+        if include_preview:
+            from agents.patch_generator import dump_yaml
+            for key in merged_keys:
+                merged = all_resource_patches[key]
+                merged['yaml'] = dump_yaml(merged['patch'])
+                logger.debug(f"      Merged patch: {merged['yaml']}")
 
         if not all_resource_patches:
             return {"status": "warning", "message": "No patches generated"}
@@ -151,7 +168,8 @@ class AIKustomizeAgent:
             return {
                 "status": "applied",
                 "applied": results["success"],
-                "failed": results["failed"]
+                "failed": results["failed"],
+                "errors": results["errors"]
             }
         
         return {
@@ -160,35 +178,24 @@ class AIKustomizeAgent:
             "message": "Use --apply to apply changes or --export to save Kustomize files"
         }
 
-    def _deep_merge(self, base: dict, extra: dict):
-        """Deep merge two dictionaries."""
-        import collections.abc
-        for k, v in extra.items():
-            if isinstance(v, collections.abc.Mapping) and k in base and isinstance(base[k], dict):
-                self._deep_merge(base[k], v)
-            elif isinstance(v, list) and k in base and isinstance(base[k], list):
-                # For lists (like containers), merge by name if possible
-                if k == "containers" or k == "initContainers":
-                    self._merge_containers(base[k], v)
-                else:
-                    # Fallback: extend if not already present
-                    for item in v:
-                        if item not in base[k]:
-                            base[k].append(item)
-            else:
-                base[k] = v
-
-    def _merge_containers(self, base_list: list, extra_list: list):
-        """Merge container lists by name."""
-        base_map = {c["name"]: c for c in base_list}
-        for extra_c in extra_list:
-            name = extra_c.get("name")
-            if name in base_map:
-                self._deep_merge(base_map[name], extra_c)
-            else:
-                base_list.append(extra_c)
+    def _process_intent(self, intent: dict, include_preview: bool) -> list:
+        """Scan resources for one intent and generate its patches."""
+        logger.info(f"   Action: {intent.get('action')} on {intent.get('target_field')}")
+        
+        resources = self.scanner.scan(
+            resource_type=intent.get("resource_type", "deployments"),
+            namespace=self.namespace or intent.get("namespace"),
+            labels=intent.get("label_selector")
+        )
+        
+        if not resources:
+            logger.warning(f"      No matching resources found for {intent.get('target_field')}")
+            return []
+        
+        return self.patch_generator.generate(
+            intent, resources, include_preview=include_preview
+        )
 
-    
     def _confirm_apply(self, patch_count: int) -> bool:
         """Ask user to confirm before applying."""
         response = input(f"\n⚠️  Apply {patch_count} patches? [y/N]: ")
@@ -196,19 +203,21 @@ class AIKustomizeAgent:
     
     def _apply_patches(self, patches: list) -> dict:
         """Apply patches to the cluster."""
-        success = 0
-        failed = 0
+        try:
+            statuses = self.scanner.apply_patches(patches)
+        except Exception as e:
+            logger.error(f"   ❌ Failed to apply patches: {e}")
+            statuses = [{"name": p["name"], "applied": False, "error": str(e)} for p in patches]
         
-        for patch in patches:
-            try:
-                self.scanner.apply_patch(patch)
-                success += 1
-                logger.info(f"   ✅ Applied: {patch['name']}")
-            except Exception as e:
-                failed += 1
-                logger.error(f"   ❌ Failed: {patch['name']} - {e}")
+        errors = {}
+        for status in statuses:
+            if status["applied"]:
+                logger.info(f"   ✅ Applied: {status['name']}")
+            else:
+                errors[status["name"]] = status["error"]
+                logger.error(f"   ❌ Failed: {status['name']} - {status['error']}")
         
-        return {"success": success, "failed": failed}
+        return {"success": len(statuses) - len(errors), "failed": len(errors), "errors": errors}
 
 
 def main():
@@ -287,6 +296,13 @@ Examples:
         help="Skip confirmation prompt when applying"
     )
     
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=4,
+        help="Intents to scan and generate in parallel (default: 4)"
+    )
+    
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -316,13 +332,17 @@ Examples:
             context=args.context,
             namespace=args.namespace,
             dry_run=not args.apply,
+            jobs=args.jobs,
             yes=args.yes
         )
         
-        result = agent.run(
-            user_request=args.request,
-            export_path=args.export
-        )
+        try:
+            result = agent.run(
+                user_request=args.request,
+                export_path=args.export
+            )
+        finally:
+            agent.close()
         
         # Print result
         print(f"\n{'='*50}")
@@ -2,16 +2,17 @@
 Diff Preview - Shows changes before applying.
 """
 
+import os
 import logging
 import subprocess
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
 
 class DiffPreview:
     """Generate and display diffs for pending changes."""
-    
+
     def show(self, patches: List[Dict]):
         """Display all patches as diffs."""
         for patch in patches:
@@ -19,37 +20,115 @@ class DiffPreview:
             print(f"📝 {patch['kind']}/{patch['name']} ({patch['namespace']})")
             print('='*60)
             print(patch['yaml'])
-    
-    def kubectl_diff(self, patches: List[Dict]) -> str:
+
+    def kubectl_diff(
+        self,
+        patches: List[Dict],
+        single: bool = False,
+        reuse_local: bool = True
+    ) -> str:
         """
         Use kubectl diff to show actual changes.
         Requires kubectl and cluster access.
+
+        Args:
+            patches: Patches with rendered "yaml"
+            single: Run one kubectl process per patch, so a patch kubectl
+                rejects doesn't hide the diffs of the others
+            reuse_local: Show the diff PatchGenerator already rendered
+                (patch["diff"]) instead of asking kubectl; False always
+                compares against the live cluster
+
+        Returns:
+            Diff output grouped by patch name
         """
+        to_diff = [p for p in patches if not (reuse_local and p.get('diff'))]
+        live = iter(self._live_diffs(to_diff, single))
+
         results = []
-        
         for patch in patches:
-            try:
-                # Write patch to temp file
-                import tempfile
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
-                    f.write(patch['yaml'])
-                    temp_path = f.name
-                
-                # Run kubectl diff
-                result = subprocess.run(
-                    ['kubectl', 'diff', '-f', temp_path],
-                    capture_output=True,
-                    text=True
-                )
-                
-                if result.stdout:
-                    results.append(f"--- {patch['name']} ---\n{result.stdout}")
-                
-                # Cleanup
-                import os
-                os.unlink(temp_path)
-                
-            except Exception as e:
-                logger.warning(f"kubectl diff failed: {e}")
-        
+            text = patch['diff'] if reuse_local and patch.get('diff') else next(live)
+            if text:
+                results.append(f"--- {patch['name']} ---\n{text}")
+
         return "\n".join(results) if results else "No differences found"
+
+    def _live_diffs(self, patches: List[Dict], single: bool) -> List[Optional[str]]:
+        """kubectl diff output for each patch (None = no difference or failure)."""
+        if not patches:
+            return []
+
+        if single or len(patches) == 1:
+            return [self._diff_one(p) for p in patches]
+
+        # One kubectl run for all patches: auth and API discovery happen once
+        combined = "\n---\n".join(p['yaml'] for p in patches)
+        result = self._run_diff(combined)
+
+        # Exit code 0 = no differences, 1 = differences, >1 = kubectl error
+        if result is None or result.returncode > 1:
+            logger.warning("Batched kubectl diff failed, diffing patches one by one")
+            return [self._diff_one(p) for p in patches]
+
+        by_resource = self._split_diff(result.stdout)
+        return [
+            by_resource.get((p['kind'], p['namespace'], p['patch']['metadata']['name']))
+            for p in patches
+        ]
+
+    def _diff_one(self, patch: Dict) -> Optional[str]:
+        """kubectl diff for a single patch."""
+        result = self._run_diff(patch['yaml'])
+        if result is not None and result.stdout:
+            return result.stdout
+        return None
+
+    def _run_diff(self, manifest: str) -> Optional[subprocess.CompletedProcess]:
+        """Run kubectl diff on a manifest, or return None if it couldn't run."""
+        try:
+            # Feed the manifest on stdin; no temp file to write and clean up
+            return subprocess.run(
+                ['kubectl', 'diff', '-f', '-'],
+                input=manifest,
+                capture_output=True,
+                text=True
+            )
+        except Exception as e:
+            logger.warning(f"kubectl diff failed: {e}")
+            return None
+
+    def _split_diff(self, output: str) -> Dict[tuple, str]:
+        """
+        Split combined kubectl diff output into per-resource sections.
+
+        Each section starts with a "diff -u -N .../LIVE-x/<file> .../MERGED-x/<file>"
+        line, where <file> is "[group.]version.Kind.namespace.name".
+
+        Returns:
+            Mapping of (kind, namespace, name) to that resource's diff text
+        """
+        sections = {}
+        key = None
+        lines = []
+
+        for line in output.splitlines(keepends=True):
+            if line.startswith("diff "):
+                if key:
+                    sections[key] = "".join(lines)
+                key = self._resource_key(line.split()[-1])
+                lines = []
+            lines.append(line)
+
+        if key:
+            sections[key] = "".join(lines)
+        return sections
+
+    def _resource_key(self, path: str) -> Optional[tuple]:
+        """(kind, namespace, name) from a kubectl diff file name."""
+        parts = os.path.basename(path).split(".")
+        # Group and version are lowercase; the kind is the first capitalized part.
+        # Namespaces can't contain dots, but names can.
+        for i, part in enumerate(parts[:-2]):
+            if part[:1].isupper():
+                return (part, parts[i + 1], ".".join(parts[i + 2:]))
+        return None
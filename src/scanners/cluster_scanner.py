@@ -2,14 +2,74 @@
 Cluster Scanner - Scans live Kubernetes cluster for resources.
 """
 
+import os
+import copy
+import json
+import time
+import datetime
 import logging
-from typing import Dict, List, Optional, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
 
 logger = logging.getLogger(__name__)
 
+# orjson is optional; it encodes the patch keys used to spot duplicates faster
+try:
+    import orjson
+    
+    def _patch_key(patch: Dict) -> bytes:
+        return orjson.dumps(patch, option=orjson.OPT_SORT_KEYS)
+except ImportError:
+    def _patch_key(patch: Dict) -> str:
+        return json.dumps(patch, sort_keys=True)
+
+# Max patch requests in flight at once when applying a batch
+KUBE_APPLY_CONCURRENCY = int(os.getenv("KUBE_APPLY_CONCURRENCY", "20"))
+
+# Kept-alive API connections; must cover concurrent applies plus the scan("all")
+# fan-out, or urllib3 discards connections and every request pays a new handshake
+KUBE_CONNECTION_POOL_MAXSIZE = int(os.getenv(
+    "KUBE_CONNECTION_POOL_MAXSIZE",
+    str(max(10, (os.cpu_count() or 1) * 2, KUBE_APPLY_CONCURRENCY + 4))
+))
+
+# Seconds a scan result is reused for the same (type, namespace, labels); 0 disables.
+# Off by default: one-shot CLI runs gain little. The API server turns it on.
+KUBE_SCAN_CACHE_TTL = float(os.getenv("KUBE_SCAN_CACHE_TTL", "0"))
+_SCAN_CACHE_SIZE = 64
+
+# Concurrent scans in scan_many; each holds a pooled connection while in flight
+_SCAN_MANY_WORKERS = 8
+
+# Objects requested per LIST page
+KUBE_LIST_PAGE_SIZE = int(os.getenv("KUBE_LIST_PAGE_SIZE", "500"))
+
+# Model class -> ((python attribute, JSON key), ...), filled on first use
+_MODEL_FIELDS: Dict[type, tuple] = {}
+_LEAF_TYPES = (str, int, float, bool, bytes)
+
+# Kinds scanned for each resource type; "all" matches scan("all")
+_RESOURCE_KINDS = {
+    "deployments": ("Deployment",), "deployment": ("Deployment",), "deploy": ("Deployment",),
+    "services": ("Service",), "service": ("Service",), "svc": ("Service",),
+    "pods": ("Pod",), "pod": ("Pod",), "po": ("Pod",),
+    "configmaps": ("ConfigMap",), "configmap": ("ConfigMap",), "cm": ("ConfigMap",),
+    "all": ("Deployment", "Service", "Pod"),
+}
+
+
+def _api_error_message(e: ApiException) -> str:
+    """Short reason for an API error: the Status message if the body has one."""
+    try:
+        message = json.loads(e.body).get("message")
+    except (TypeError, ValueError, AttributeError):
+        message = None
+    return f"{e.status} {e.reason}: {message}" if message else f"{e.status} {e.reason}"
+
 
 class ClusterScanner:
     """Scans a live Kubernetes cluster for resources."""
@@ -19,13 +79,80 @@ class ClusterScanner:
         kubeconfig: Optional[str] = None,
         context: Optional[str] = None,
         api_server: Optional[str] = None,
-        token: Optional[str] = None
+        token: Optional[str] = None,
+        watch_cache: bool = False,
+        lite: bool = False,
+        scan_cache_ttl: Optional[float] = None
     ):
+        """
+        Args:
+            watch_cache: Keep a watch-updated copy of each scanned kind and
+                answer scans from it instead of LISTing. Meant for long-lived
+                processes (the API server); holds every object of those kinds
+                in memory.
+            lite: Return only what the transformers read (name, namespace,
+                labels, annotations and containers) instead of full objects
+                with status and managedFields
+            scan_cache_ttl: Seconds scan results are reused for identical
+                scans (default KUBE_SCAN_CACHE_TTL; 0 disables)
+        """
+        self._lite = lite
+        self._scan_cache_ttl = KUBE_SCAN_CACHE_TTL if scan_cache_ttl is None else scan_cache_ttl
         self._load_config(kubeconfig, context, api_server, token)
         
-        self.core_v1 = client.CoreV1Api()
-        self.apps_v1 = client.AppsV1Api()
-        self.networking_v1 = client.NetworkingV1Api()
+        # One ApiClient (and so one urllib3 connection pool) for every API group
+        # and for serializing results
+        configuration = client.Configuration.get_default_copy()
+        configuration.connection_pool_maxsize = KUBE_CONNECTION_POOL_MAXSIZE
+        self.api_client = client.ApiClient(configuration)
+        self.core_v1 = client.CoreV1Api(self.api_client)
+        self.apps_v1 = client.AppsV1Api(self.api_client)
+        self.networking_v1 = client.NetworkingV1Api(self.api_client)
+        
+        # (resource_type, namespace, labels) -> (expiry, resources)
+        self._scan_cache: Dict[tuple, tuple] = {}
+        self._scan_cache_lock = threading.Lock()
+        
+        # Lists the resource kinds of scan("all") concurrently
+        self._executor = ThreadPoolExecutor(max_workers=4)
+        
+        # kind -> (apiVersion, namespaced LIST, all-namespaces LIST)
+        self._list_calls = {
+            "Deployment": ("apps/v1", self.apps_v1.list_namespaced_deployment,
+                           self.apps_v1.list_deployment_for_all_namespaces),
+            "Service": ("v1", self.core_v1.list_namespaced_service,
+                        self.core_v1.list_service_for_all_namespaces),
+            "Pod": ("v1", self.core_v1.list_namespaced_pod,
+                    self.core_v1.list_pod_for_all_namespaces),
+            "ConfigMap": ("v1", self.core_v1.list_namespaced_config_map,
+                          self.core_v1.list_config_map_for_all_namespaces),
+        }
+        
+        # kind -> KindCache
+        self._watch_caches: Dict[str, Any] = {}
+        if watch_cache:
+            self._start_watch_caches()
+    
+    def _start_watch_caches(self):
+        """Start one list+watch thread per scanned kind."""
+        from .watch_cache import KindCache
+        
+        for kind, (api_version, _, list_fn) in self._list_calls.items():
+            self._watch_caches[kind] = KindCache(kind, api_version, list_fn, self._resource_dict)
+        logger.info(f"👀 Watching {', '.join(self._list_calls)} for scans")
+    
+    def close(self):
+        """Release the worker threads, watches and the API connection pool."""
+        for cache in self._watch_caches.values():
+            cache.stop()
+        self._executor.shutdown(wait=False)
+        self.api_client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
     
     def _load_config(
         self,
@@ -78,36 +205,172 @@ class ClusterScanner:
         Returns:
             List of resource dictionaries
         """
+        watched = self._scan_watch_cache(resource_type, namespace, labels)
+        if watched is not None:
+            return watched
+        
+        # Intents sharing a selector (and back-to-back requests) reuse one scan
+        key = (resource_type, namespace, labels)
+        cached = self._scan_cache_get(key)
+        if cached is not None:
+            logger.debug(f"Scan cache hit: {key}")
+            return cached
+        
+        kinds = _RESOURCE_KINDS.get(resource_type)
+        if not kinds:
+            logger.warning(f"Unknown resource type: {resource_type}")
+            return []
+        
         resources = []
         
         try:
-            if resource_type in ["deployments", "deployment", "deploy"]:
-                resources = self._get_deployments(namespace, labels)
-            
-            elif resource_type in ["services", "service", "svc"]:
-                resources = self._get_services(namespace, labels)
-            
-            elif resource_type in ["pods", "pod", "po"]:
-                resources = self._get_pods(namespace, labels)
-            
-            elif resource_type in ["configmaps", "configmap", "cm"]:
-                resources = self._get_configmaps(namespace, labels)
-            
-            elif resource_type == "all":
-                resources = (
-                    self._get_deployments(namespace, labels) +
-                    self._get_services(namespace, labels) +
-                    self._get_pods(namespace, labels)
-                )
-            
+            if len(kinds) == 1:
+                resources = self._list_kind(kinds[0], namespace, labels)
             else:
-                logger.warning(f"Unknown resource type: {resource_type}")
+                resources, complete = self._scan_all(kinds, namespace, labels)
+                if not complete:
+                    # Don't cache a partial result
+                    return resources
         
         except ApiException as e:
             logger.error(f"API error scanning {resource_type}: {e}")
+            return resources
         
+        self._scan_cache_put(key, resources)
         return resources
     
+    def iter_scan(
+        self,
+        resource_type: str = "deployments",
+        namespace: Optional[str] = None,
+        labels: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield resources as each LIST page arrives instead of returning a list.
+        
+        Only one page (KUBE_LIST_PAGE_SIZE objects) is held at a time, so
+        callers that handle resources one by one stay flat in memory on large
+        clusters. Results bypass the scan cache. A kind whose LIST fails is
+        logged and skipped, as in scan("all").
+        
+        Args:
+            resource_type: Type of resource to scan
+            namespace: Specific namespace or None for all
+            labels: Label selector (e.g., "app=web")
+        """
+        kinds = _RESOURCE_KINDS.get(resource_type)
+        if not kinds:
+            logger.warning(f"Unknown resource type: {resource_type}")
+            return
+        
+        watched = self._scan_watch_cache(resource_type, namespace, labels)
+        if watched is not None:
+            yield from watched
+            return
+        
+        for kind in kinds:
+            try:
+                yield from self._iter_kind(kind, namespace, labels)
+            except ApiException as e:
+                logger.error(f"API error streaming {kind}: {e}")
+    
+    def scan_many(
+        self,
+        specs: List[Tuple[str, Optional[str]]],
+        labels: Optional[str] = None
+    ) -> Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]]:
+        """
+        Run several scans concurrently.
+        
+        Args:
+            specs: (resource_type, namespace) pairs to scan
+            labels: Label selector applied to every scan
+        
+        Returns:
+            Mapping of each (resource_type, namespace) pair to its resources
+        """
+        specs = list(dict.fromkeys(specs))
+        if len(specs) <= 1:
+            return {spec: self.scan(*spec, labels=labels) for spec in specs}
+        
+        # A separate pool: scan("all") itself waits on self._executor
+        with ThreadPoolExecutor(max_workers=min(_SCAN_MANY_WORKERS, len(specs))) as pool:
+            results = pool.map(lambda spec: self.scan(*spec, labels=labels), specs)
+            return dict(zip(specs, results))
+    
+    def _scan_watch_cache(
+        self,
+        resource_type: str,
+        namespace: Optional[str],
+        labels: Optional[str]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer a scan from the watch caches, or return None to LIST instead
+        (watching disabled, a cache not yet synced, or a selector it can't parse).
+        """
+        if not self._watch_caches:
+            return None
+        
+        from .watch_cache import parse_selector
+        
+        requirements = parse_selector(labels)
+        caches = [self._watch_caches.get(k) for k in _RESOURCE_KINDS.get(resource_type, ())]
+        if requirements is None or not caches or not all(c and c.synced for c in caches):
+            return None
+        
+        # The cached objects are shared with the watch threads; callers (and
+        # the transformers they feed) may edit the resources
+        return [copy.deepcopy(obj) for cache in caches for obj in cache.items(namespace, requirements)]
+    
+    def _scan_all(self, kinds: Tuple[str, ...], namespace: Optional[str], labels: Optional[str]) -> tuple:
+        """
+        List several kinds concurrently.
+        
+        The calls are independent round trips, so this takes as long as the
+        slowest one rather than their sum. A failing kind is logged and
+        skipped without discarding the others.
+        
+        Returns:
+            (resources, complete) where complete is False if any list failed
+        """
+        futures = [self._executor.submit(self._list_kind, kind, namespace, labels) for kind in kinds]
+        
+        resources = []
+        complete = True
+        for kind, future in zip(kinds, futures):
+            try:
+                resources.extend(future.result())
+            except ApiException as e:
+                logger.error(f"API error listing {kind}: {e}")
+                complete = False
+        return resources, complete
+    
+    def _scan_cache_get(self, key: tuple) -> Optional[List[Dict[str, Any]]]:
+        """Unexpired scan result for key, or None."""
+        with self._scan_cache_lock:
+            entry = self._scan_cache.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        # Callers (and the transformers they feed) may edit the resources
+        return copy.deepcopy(entry[1])
+    
+    def _scan_cache_put(self, key: tuple, resources: List[Dict[str, Any]]):
+        """Remember a scan result for scan_cache_ttl seconds."""
+        if self._scan_cache_ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._scan_cache_lock:
+            if len(self._scan_cache) >= _SCAN_CACHE_SIZE:
+                self._scan_cache = {k: v for k, v in self._scan_cache.items() if v[0] >= now}
+                if len(self._scan_cache) >= _SCAN_CACHE_SIZE:
+                    self._scan_cache.clear()
+            self._scan_cache[key] = (now + self._scan_cache_ttl, copy.deepcopy(resources))
+    
+    def clear_scan_cache(self):
+        """Drop cached scan results, e.g. after the cluster was modified."""
+        with self._scan_cache_lock:
+            self._scan_cache.clear()
+    
     def list_namespaces(self) -> List[str]:
         """List all namespaces in the cluster."""
         try:
@@ -117,89 +380,104 @@ class ClusterScanner:
             logger.error(f"Failed to list namespaces: {e}")
             return []
     
-    def _get_deployments(self, namespace: Optional[str], labels: Optional[str]) -> List[Dict]:
-        """Get deployments."""
-        if namespace:
-            result = self.apps_v1.list_namespaced_deployment(
-                namespace=namespace,
-                label_selector=labels
-            )
-        else:
-            result = self.apps_v1.list_deployment_for_all_namespaces(
-                label_selector=labels
-            )
-        
-        resources = []
-        for item in result.items:
-            d = self._to_dict(item)
-            d["kind"] = "Deployment"
-            d["apiVersion"] = "apps/v1"
-            resources.append(d)
-        return resources
+    def _list_kind(self, kind: str, namespace: Optional[str], labels: Optional[str]) -> List[Dict]:
+        """List one kind (a key of _list_calls) as resource dictionaries."""
+        return list(self._iter_kind(kind, namespace, labels))
     
-    def _get_services(self, namespace: Optional[str], labels: Optional[str]) -> List[Dict]:
-        """Get services."""
+    def _iter_kind(self, kind: str, namespace: Optional[str], labels: Optional[str]) -> Iterator[Dict]:
+        """Yield one kind's resource dictionaries as each LIST page arrives."""
+        api_version, list_namespaced, list_all_namespaces = self._list_calls[kind]
         if namespace:
-            result = self.core_v1.list_namespaced_service(
-                namespace=namespace,
-                label_selector=labels
-            )
+            items = self._iter_items(list_namespaced, namespace=namespace, label_selector=labels)
         else:
-            result = self.core_v1.list_service_for_all_namespaces(
-                label_selector=labels
-            )
+            items = self._iter_items(list_all_namespaces, label_selector=labels)
         
-        resources = []
-        for item in result.items:
-            d = self._to_dict(item)
-            d["kind"] = "Service"
-            d["apiVersion"] = "v1"
-            resources.append(d)
-        return resources
+        for item in items:
+            d = self._resource_dict(item)
+            d["kind"] = kind
+            d["apiVersion"] = api_version
+            yield d
     
-    def _get_pods(self, namespace: Optional[str], labels: Optional[str]) -> List[Dict]:
-        """Get pods."""
-        if namespace:
-            result = self.core_v1.list_namespaced_pod(
-                namespace=namespace,
-                label_selector=labels
-            )
-        else:
-            result = self.core_v1.list_pod_for_all_namespaces(
-                label_selector=labels
-            )
+    def _iter_items(self, list_fn, **kwargs) -> Iterator[Any]:
+        """
+        Yield the items of a LIST call, fetched KUBE_LIST_PAGE_SIZE at a time.
         
-        resources = []
-        for item in result.items:
-            d = self._to_dict(item)
-            d["kind"] = "Pod"
-            d["apiVersion"] = "v1"
-            resources.append(d)
-        return resources
+        Paging keeps each response (and the API server's work per request)
+        bounded on large clusters instead of returning every object at once.
+        """
+        _continue = None
+        while True:
+            result = list_fn(limit=KUBE_LIST_PAGE_SIZE, _continue=_continue, **kwargs)
+            yield from result.items
+            _continue = result.metadata._continue
+            if not _continue:
+                return
     
-    def _get_configmaps(self, namespace: Optional[str], labels: Optional[str]) -> List[Dict]:
-        """Get configmaps."""
-        if namespace:
-            result = self.core_v1.list_namespaced_config_map(
-                namespace=namespace,
-                label_selector=labels
-            )
-        else:
-            result = self.core_v1.list_config_map_for_all_namespaces(
-                label_selector=labels
-            )
+    def _resource_dict(self, item) -> Dict:
+        """Convert a listed object to a resource dictionary (lite or full)."""
+        return self._to_lite_dict(item) if self._lite else self._to_dict(item)
+    
+    def _to_lite_dict(self, item) -> Dict:
+        """
+        Minimal resource dictionary: metadata name, namespace, labels and
+        annotations, plus the containers of a pod spec or pod template.
+        """
+        meta = item.metadata
+        metadata = {"name": meta.name}
+        for key, value in (("namespace", meta.namespace),
+                           ("labels", meta.labels),
+                           ("annotations", meta.annotations)):
+            if value is not None:
+                metadata[key] = value
+        d = {"metadata": metadata}
         
-        resources = []
-        for item in result.items:
-            d = self._to_dict(item)
-            d["kind"] = "ConfigMap"
-            d["apiVersion"] = "v1"
-            resources.append(d)
-        return resources
+        spec = getattr(item, "spec", None)
+        template = getattr(spec, "template", None)
+        pod_spec = template.spec if template is not None else spec
+        containers = getattr(pod_spec, "containers", None)
+        if containers is not None:
+            pod_spec_dict = {"containers": [self._to_dict(c) for c in containers]}
+            if template is not None:
+                d["spec"] = {"template": {"spec": pod_spec_dict}}
+            else:
+                d["spec"] = pod_spec_dict
+        return d
     
     def _to_dict(self, k8s_object) -> Dict:
-        """Convert Kubernetes object to dictionary."""
-        return client.ApiClient().sanitize_for_serialization(k8s_object)
+        """
+        Convert Kubernetes object to dictionary.
+        
+        Same output as ApiClient.sanitize_for_serialization, but reads each
+        model class's openapi_types/attribute_map once instead of building an
+        intermediate to_dict() per object, which dominated large scans.
+        """
+        if k8s_object is None or isinstance(k8s_object, _LEAF_TYPES):
+            return k8s_object
+        if isinstance(k8s_object, list):
+            return [self._to_dict(v) for v in k8s_object]
+        if isinstance(k8s_object, dict):
+            return {k: self._to_dict(v) for k, v in k8s_object.items()}
+        
+        cls = type(k8s_object)
+        fields = _MODEL_FIELDS.get(cls)
+        if fields is None and hasattr(cls, "openapi_types"):
+            fields = _MODEL_FIELDS[cls] = tuple(
+                (attr, cls.attribute_map[attr]) for attr in cls.openapi_types
+            )
+        
+        if fields is not None:
+            # Unset (None) fields are omitted
+            d = {}
+            for attr, key in fields:
+                value = getattr(k8s_object, attr)
+                if value is not None:
+                    d[key] = self._to_dict(value)
+            return d
+        
+        if isinstance(k8s_object, (datetime.datetime, datetime.date)):
+            return k8s_object.isoformat()
+        # Rare leaves (tuples, Decimal, ...)
+        return self.api_client.sanitize_for_serialization(k8s_object)
     
     def apply_patch(self, patch: Dict) -> bool:
         """
@@ -211,6 +489,10 @@ class ClusterScanner:
         Returns:
             True if successful
         """
+        return self._apply_one(patch) is None
+    
+    def _apply_one(self, patch: Dict) -> Optional[str]:
+        """Apply a patch; returns None on success, else why it failed."""
         kind = patch.get("kind")
         name = patch["patch"]["metadata"]["name"]
         namespace = patch.get("namespace", "default")
@@ -243,10 +525,62 @@ class ClusterScanner:
                 )
             else:
                 logger.warning(f"Cannot apply patch for kind: {kind}")
-                return False
+                return f"Cannot apply patch for kind: {kind}"
             
-            return True
+            # Cached scans no longer reflect the cluster
+            self.clear_scan_cache()
+            return None
             
         except ApiException as e:
             logger.error(f"Failed to apply patch: {e}")
-            return False
+            return _api_error_message(e)
+        except Exception as e:
+            logger.error(f"Failed to apply patch: {e}")
+            return str(e)
+    
+    def apply_patches(
+        self,
+        patches: List[Dict],
+        max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply several patches concurrently.
+        
+        The API clients share one connection pool, so the requests reuse
+        connections instead of running one round trip after another.
+        
+        Args:
+            patches: Patch dictionaries as accepted by apply_patch
+            max_concurrency: Max requests in flight (default: KUBE_APPLY_CONCURRENCY)
+        
+        Returns:
+            One {"name", "applied", "error"} status per patch, in the same
+            order; "error" is None for applied patches
+        """
+        if len(patches) <= 1:
+            return [self._apply_status(p, self._apply_one(p)) for p in patches]
+        
+        # Intents that produce the same change for a resource yield identical
+        # patches; send each distinct one once and share its result
+        index_of: Dict[tuple, int] = {}
+        unique = []
+        slots = []
+        for p in patches:
+            key = (p.get("kind"), p.get("namespace"), _patch_key(p["patch"]))
+            if key not in index_of:
+                index_of[key] = len(unique)
+                unique.append(p)
+            slots.append(index_of[key])
+        
+        if len(unique) < len(patches):
+            logger.info(f"Skipping {len(patches) - len(unique)} duplicate patches")
+        
+        workers = min(max_concurrency or KUBE_APPLY_CONCURRENCY, len(unique))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            errors = list(pool.map(self._apply_one, unique))
+        return [self._apply_status(p, errors[i]) for p, i in zip(patches, slots)]
+    
+    @staticmethod
+    def _apply_status(patch: Dict, error: Optional[str]) -> Dict[str, Any]:
+        """apply_patches' status entry for one patch."""
+        return {"name": patch.get("name"), "applied": error is None, "error": error}
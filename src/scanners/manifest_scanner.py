@@ -3,14 +3,148 @@ Manifest Scanner - Scans local YAML manifest files.
 """
 
 import os
+import atexit
 import logging
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 
 import yaml
 
 logger = logging.getLogger(__name__)
 
+# Prefer the LibYAML C parser; the pure-Python one is roughly 10x slower
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+    logger.warning("PyYAML was built without LibYAML; manifest parsing will be slow. "
+                   "Install libyaml-dev and reinstall pyyaml to enable it.")
+
+# Loader bound once instead of passed on every file
+_load_all = functools.partial(yaml.load_all, Loader=_Loader)
+
+# Worker processes for parsing manifests; parsing is CPU-bound, so threads
+# wouldn't help. Small trees are parsed inline to skip the pool start-up cost.
+MANIFEST_SCAN_WORKERS = int(os.getenv("MANIFEST_SCAN_WORKERS", str(os.cpu_count() or 1)))
+_PARALLEL_MIN_FILES = 16
+
+# Shared by every scan and started on first use; see _get_pool()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+_YAML_SUFFIXES = (".yaml", ".yml")
+
+# Resource type aliases accepted by scan(); other values are used as the kind
+_KIND_MAP = {
+    "deployments": "Deployment",
+    "deployment": "Deployment",
+    "deploy": "Deployment",
+    "services": "Service",
+    "service": "Service",
+    "svc": "Service",
+    "pods": "Pod",
+    "pod": "Pod",
+    "po": "Pod",
+    "configmaps": "ConfigMap",
+    "configmap": "ConfigMap",
+    "cm": "ConfigMap",
+}
+
+
+def _matches(
+    doc: Dict,
+    target_kind: Optional[str],
+    namespace: Optional[str],
+    label_filters: Optional[Tuple[Tuple[str, str], ...]]
+) -> bool:
+    """Check a resource against scan()'s kind, namespace and label filters."""
+    if target_kind is not None and doc.get("kind") != target_kind:
+        return False
+    metadata = doc.get("metadata") or {}
+    if namespace and metadata.get("namespace") != namespace:
+        return False
+    if label_filters:
+        resource_labels = metadata.get("labels") or {}
+        return all(resource_labels.get(k) == v for k, v in label_filters)
+    return True
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for parsing manifests, shared by all scans in this process.
+    
+    Workers are spawned rather than forked: the CLI scans from several --jobs
+    threads, and forking a multithreaded process can copy locks (logging,
+    imports) held by another thread and deadlock the child.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=MANIFEST_SCAN_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def _iter_yaml_files(root: str) -> Iterator[str]:
+    """
+    Yield the paths of *.yaml and *.yml files under root.
+    
+    One os.scandir pass covers both extensions, and directory entries carry
+    their file type, so non-matching entries cost no stat() or Path object.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(_YAML_SUFFIXES) and entry.is_file():
+                    yield entry.path
+
+
+def _load_manifest_file(
+    file_path: str,
+    target_kind: Optional[str] = None,
+    namespace: Optional[str] = None,
+    label_filters: Optional[Tuple[Tuple[str, str], ...]] = None
+) -> List[Dict]:
+    """
+    Load the resources in a single YAML file that pass the given filters.
+    
+    Module-level so worker processes can run it; filtering here means
+    non-matching documents are never sent back to the parent process.
+    """
+    resources = []
+    
+    try:
+        # Parse straight from the file: the loader reads it incrementally and
+        # decodes the bytes itself, so the whole text is never held as a str
+        with open(file_path, 'rb') as f:
+            # Handle multi-document YAML
+            for doc in _load_all(f):
+                if doc and isinstance(doc, dict):
+                    # Add source file reference
+                    if "metadata" not in doc:
+                        doc["metadata"] = {}
+                    doc["metadata"]["_source_file"] = str(file_path)
+                    
+                    if _matches(doc, target_kind, namespace, label_filters):
+                        resources.append(doc)
+                
+    except yaml.YAMLError as e:
+        logger.warning(f"Failed to parse {file_path}: {e}")
+    except Exception as e:
+        logger.error(f"Error reading {file_path}: {e}")
+    
+    return resources
+
 
 class ManifestScanner:
     """Scans local YAML manifest files for resources."""
@@ -38,86 +172,45 @@ class ManifestScanner:
         Returns:
             List of resource dictionaries
         """
-        all_resources = self._load_all_manifests()
-        
-        # Filter by type
-        kind_map = {
-            "deployments": "Deployment",
-            "deployment": "Deployment",
-            "deploy": "Deployment",
-            "services": "Service",
-            "service": "Service",
-            "svc": "Service",
-            "pods": "Pod",
-            "pod": "Pod",
-            "po": "Pod",
-            "configmaps": "ConfigMap",
-            "configmap": "ConfigMap",
-            "cm": "ConfigMap",
-        }
-        
-        if resource_type != "all":
-            target_kind = kind_map.get(resource_type, resource_type)
-            all_resources = [r for r in all_resources if r.get("kind") == target_kind]
+        target_kind = None if resource_type == "all" else _KIND_MAP.get(resource_type, resource_type)
+        label_filters = self._parse_labels(labels) if labels else ()
         
-        # Filter by namespace
-        if namespace:
-            all_resources = [
-                r for r in all_resources 
-                if r.get("metadata", {}).get("namespace") == namespace
-            ]
-        
-        # Filter by labels
-        if labels:
-            label_filters = self._parse_labels(labels)
-            all_resources = [
-                r for r in all_resources
-                if self._matches_labels(r, label_filters)
-            ]
-        
-        return all_resources
+        # Filter while loading, so only matching resources are ever held
+        return list(self._iter_manifests(target_kind, namespace, label_filters))
     
-    def _load_all_manifests(self) -> List[Dict]:
-        """Load all YAML manifests from path."""
-        resources = []
+    def _iter_manifests(
+        self,
+        target_kind: Optional[str] = None,
+        namespace: Optional[str] = None,
+        label_filters: Optional[Tuple[Tuple[str, str], ...]] = None
+    ) -> Iterator[Dict]:
+        """Yield the resources under path that pass the given filters, file by file."""
+        load = functools.partial(
+            _load_manifest_file,
+            target_kind=target_kind,
+            namespace=namespace,
+            label_filters=label_filters
+        )
         
         if self.path.is_file():
-            resources.extend(self._load_file(self.path))
-        else:
-            # Recursively find all YAML files
-            for ext in ["*.yaml", "*.yml"]:
-                for file_path in self.path.rglob(ext):
-                    resources.extend(self._load_file(file_path))
+            yield from load(str(self.path))
+            return
         
-        return resources
-    
-    def _load_file(self, file_path: Path) -> List[Dict]:
-        """Load resources from a single YAML file."""
-        resources = []
+        # Recursively find all YAML files
+        files = list(_iter_yaml_files(str(self.path)))
         
-        try:
-            with open(file_path, 'r') as f:
-                content = f.read()
-            
-            # Handle multi-document YAML
-            for doc in yaml.safe_load_all(content):
-                if doc and isinstance(doc, dict):
-                    # Add source file reference
-                    if "metadata" not in doc:
-                        doc["metadata"] = {}
-                    doc["metadata"]["_source_file"] = str(file_path)
-                    
-                    resources.append(doc)
-                    
-        except yaml.YAMLError as e:
-            logger.warning(f"Failed to parse {file_path}: {e}")
-        except Exception as e:
-            logger.error(f"Error reading {file_path}: {e}")
+        if MANIFEST_SCAN_WORKERS > 1 and len(files) > _PARALLEL_MIN_FILES:
+            for resources in _get_pool().map(load, files, chunksize=8):
+                yield from resources
+            return
         
-        return resources
+        for f in files:
+            yield from load(f)
     
-    def _parse_labels(self, labels: str) -> Dict[str, str]:
-        """Parse label selector string."""
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _parse_labels(labels: str) -> Tuple[Tuple[str, str], ...]:
+        """Parse label selector string into (key, value) pairs; cached per selector."""
         result = {}
         
         for pair in labels.split(","):
@@ -125,17 +218,7 @@ class ManifestScanner:
                 key, value = pair.split("=", 1)
                 result[key.strip()] = value.strip()
         
-        return result
-    
-    def _matches_labels(self, resource: Dict, filters: Dict[str, str]) -> bool:
-        """Check if resource matches label filters."""
-        resource_labels = resource.get("metadata", {}).get("labels", {})
-        
-        for key, value in filters.items():
-            if resource_labels.get(key) != value:
-                return False
-        
-        return True
+        return tuple(result.items())
     
     def apply_patch(self, patch: Dict) -> bool:
         """
@@ -144,3 +227,14 @@ class ManifestScanner:
         """
         logger.warning("Cannot apply patches in file mode. Use --export instead.")
         return False
+    
+    def apply_patches(self, patches: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        In file mode, patches are exported, not applied.
+        This is a no-op placeholder.
+        """
+        logger.warning("Cannot apply patches in file mode. Use --export instead.")
+        return [
+            {"name": p.get("name"), "applied": False, "error": "file mode: use --export"}
+            for p in patches
+        ]
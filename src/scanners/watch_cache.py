@@ -0,0 +1,218 @@
+"""
+Watch Cache - Keeps a local, watch-updated copy of cluster resources.
+"""
+
+import re
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+logger = logging.getLogger(__name__)
+
+# (key, operator, value): operator is "=", "!=", "in", "notin", "exists" or "!";
+# value is a string for "="/"!=", a frozenset for "in"/"notin", else None
+Requirement = Tuple[str, str, Any]
+
+# Label keys ("prefix/name") and values use only these characters
+_KEY = r"[A-Za-z0-9][-A-Za-z0-9_./]*"
+_VALUE = r"[-A-Za-z0-9_.]*"
+
+_EQUALITY_RE = re.compile(rf"^({_KEY})\s*(==|=|!=)\s*({_VALUE})$")
+_SET_RE = re.compile(rf"^({_KEY})\s+(in|notin)\s+\(\s*({_VALUE}(?:\s*,\s*{_VALUE})*)\s*\)$")
+_EXISTS_RE = re.compile(rf"^(!?)\s*({_KEY})$")
+
+
+def _split_terms(labels: str) -> List[str]:
+    """Split a selector on the commas that aren't inside a (value, list)."""
+    terms, depth, start = [], 0, 0
+    for i, c in enumerate(labels):
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "," and depth == 0:
+            terms.append(labels[start:i])
+            start = i + 1
+    terms.append(labels[start:])
+    return [t.strip() for t in terms if t.strip()]
+
+
+def parse_selector(labels: Optional[str]) -> Optional[List[Requirement]]:
+    """
+    Parse a label selector.
+    
+    Supports "k=v", "k==v", "k!=v", "k in (a,b)", "k notin (a,b)", "k" and
+    "!k" terms. Returns None for anything else, which callers should leave
+    to the API server.
+    """
+    requirements = []
+    for term in _split_terms(labels or ""):
+        match = _EQUALITY_RE.match(term)
+        if match:
+            key, op, value = match.groups()
+            requirements.append((key, "!=" if op == "!=" else "=", value))
+            continue
+        
+        match = _SET_RE.match(term)
+        if match:
+            key, op, values = match.groups()
+            values = frozenset(v.strip() for v in values.split(",") if v.strip())
+            if not values:
+                return None
+            requirements.append((key, op, values))
+            continue
+        
+        match = _EXISTS_RE.match(term)
+        if match:
+            negate, key = match.groups()
+            requirements.append((key, "!" if negate else "exists", None))
+            continue
+        
+        return None
+    return requirements
+
+
+def matches_selector(labels: Dict[str, str], requirements: List[Requirement]) -> bool:
+    """Check a resource's labels against parsed selector requirements."""
+    for key, op, value in requirements:
+        if op == "=":
+            if labels.get(key) != value:
+                return False
+        elif op == "!=":
+            if labels.get(key) == value:
+                return False
+        elif op == "in":
+            if labels.get(key) not in value:
+                return False
+        elif op == "notin":
+            if key in labels and labels[key] in value:
+                return False
+        elif op == "exists":
+            if key not in labels:
+                return False
+        elif key in labels:
+            return False
+    return True
+
+
+class KindCache:
+    """
+    Local copy of one resource kind across all namespaces.
+
+    A daemon thread LISTs the kind, then follows a watch from that
+    resourceVersion. The watch is restarted with a fresh LIST every
+    relist_seconds, and after any error (e.g. 410 Gone), so missed events
+    can't leave the copy stale for long.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        api_version: str,
+        list_fn: Callable,
+        to_dict: Callable[[Any], Dict],
+        relist_seconds: int = 60
+    ):
+        self.kind = kind
+        self.api_version = api_version
+        self._list_fn = list_fn
+        self._to_dict = to_dict
+        self._relist_seconds = relist_seconds
+
+        # (namespace, name) -> resource dict; entries are replaced, never mutated
+        self._objects: Dict[Tuple[Optional[str], str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._watch: Optional[watch.Watch] = None
+
+        self._thread = threading.Thread(target=self._run, name=f"watch-{kind}", daemon=True)
+        self._thread.start()
+
+    @property
+    def synced(self) -> bool:
+        """True once the initial LIST has loaded and the copy is being kept current."""
+        return self._synced.is_set()
+
+    def items(self, namespace: Optional[str], requirements: List[Requirement]) -> List[Dict[str, Any]]:
+        """Cached resources in namespace (None = all) matching the selector."""
+        with self._lock:
+            objects = list(self._objects.values())
+
+        return [
+            obj for obj in objects
+            if (not namespace or obj["metadata"].get("namespace") == namespace)
+            and matches_selector(obj["metadata"].get("labels") or {}, requirements)
+        ]
+
+    def stop(self):
+        """Stop following the watch."""
+        self._stopped.set()
+        if self._watch:
+            self._watch.stop()
+
+    def _run(self):
+        backoff = 1
+        while not self._stopped.is_set():
+            try:
+                resource_version = self._relist()
+                backoff = 1
+                self._follow(resource_version)
+            except Exception as e:
+                # Serve LIST results from the API until the copy is rebuilt
+                self._synced.clear()
+                logger.warning(f"{self.kind} watch failed, retrying in {backoff}s: {e}")
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def _relist(self) -> str:
+        result = self._list_fn()
+        objects = {}
+        for item in result.items:
+            obj = self._convert(item)
+            objects[self._key(obj)] = obj
+
+        with self._lock:
+            self._objects = objects
+        self._synced.set()
+        return result.metadata.resource_version
+
+    def _follow(self, resource_version: str):
+        self._watch = watch.Watch()
+        try:
+            for event in self._watch.stream(
+                self._list_fn,
+                resource_version=resource_version,
+                timeout_seconds=self._relist_seconds
+            ):
+                if self._stopped.is_set():
+                    return
+                if event["type"] == "ERROR":
+                    # Error event from the server; relist to resync
+                    return
+
+                obj = self._convert(event["object"])
+                with self._lock:
+                    if event["type"] == "DELETED":
+                        self._objects.pop(self._key(obj), None)
+                    else:
+                        self._objects[self._key(obj)] = obj
+        except ApiException as e:
+            # 410 Gone: our resourceVersion expired (the client raises this
+            # after its own retry). The copy is still valid, so relist now
+            # while staying synced instead of failing the watch.
+            if e.status != 410:
+                raise
+
+    def _convert(self, item) -> Dict[str, Any]:
+        obj = self._to_dict(item)
+        obj["kind"] = self.kind
+        obj["apiVersion"] = self.api_version
+        return obj
+
+    def _key(self, obj: Dict[str, Any]) -> Tuple[Optional[str], str]:
+        metadata = obj.get("metadata") or {}
+        return (metadata.get("namespace"), metadata.get("name"))
@@ -1,31 +1,116 @@
-from abc import ABC, abstractmethod
-from typing import Dict, Any
+import functools
+from abc import ABC
+from typing import Dict, Any, List, Optional
+
+# target_field values the intent schema asks the AI for, resolved without scanning
+_CANONICAL_FIELDS = {
+    "resources.limits.memory": "resources",
+    "resources.limits.cpu": "resources",
+    "image": "image",
+    "labels": "labels",
+    "annotations": "annotations",
+    "securityContext": "securityContext",
+    "replicas": "replicas",
+}
+
+
+@functools.lru_cache(maxsize=256)
+def classify_target_field(target_field: str) -> str:
+    """
+    Reduce an intent's target_field to the handler key transformers dispatch on.
+    Returns "" when no transformer knows the field.
+    """
+    canonical = _CANONICAL_FIELDS.get(target_field)
+    if canonical is not None:
+        return canonical
+
+    if "resources" in target_field:
+        return "resources"
+    elif target_field == "image":
+        return "image"
+    elif "probe" in target_field.lower():
+        return "probe"
+    elif target_field == "labels":
+        return "labels"
+    elif target_field == "annotations":
+        return "annotations"
+    elif "securityContext" in target_field:
+        return "securityContext"
+    elif "replicas" in target_field:
+        return "replicas"
+    else:
+        return ""
+
 
 class BaseTransformer(ABC):
     """Abstract base class for resource transformers."""
 
-    def __init__(self, resource: Dict[str, Any], intent: Dict[str, Any]):
+    # Handler key (see classify_target_field) -> method name
+    HANDLERS: Dict[str, str] = {}
+
+    def __init__(self, resource: Dict[str, Any], intent: Dict[str, Any], field: Optional[str] = None):
         self.resource = resource
         self.intent = intent
+        # Callers patching many resources classify the field once and pass it in
+        if field is None:
+            field = classify_target_field(intent.get("target_field") or "")
+        self.field = field
 
-    @abstractmethod
     def transform(self) -> Dict[str, Any]:
         """
         Apply the transformation to the resource.
-        Returns the patch.
+        Returns the patch, or None if this kind can't handle the target field.
         """
-        raise NotImplementedError
+        handler = self.HANDLERS.get(self.field)
+        if handler is None:
+            return None
+        return getattr(self, handler)()
+
+    def _pod_spec(self) -> Dict[str, Any]:
+        """The pod spec that holds this resource's containers."""
+        return self.resource.get("spec") or {}
+
+    def _pod_spec_patch(self, pod_spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Wrap a pod-spec fragment into this resource's patch "spec"."""
+        return pod_spec
+
+    @functools.cached_property
+    def _containers(self) -> List[Dict[str, Any]]:
+        """Containers of this resource, resolved from the pod spec once per transformer."""
+        return self._pod_spec().get("containers") or []
+
+    def _limits_value(self) -> Dict[str, Any]:
+        """Normalize the intent value into a resources.limits mapping."""
+        value = self.intent.get("value", {})
+
+        # Normalize value if it's a string
+        if isinstance(value, str):
+            target_field = self.intent.get("target_field", "").lower()
+            if "memory" in target_field:
+                value = {"memory": value}
+            elif "cpu" in target_field:
+                value = {"cpu": value}
+            else:
+                # Default to memory if we can't tell
+                value = {"memory": value}
+
+        if not isinstance(value, dict):
+            value = {"memory": "512Mi", "cpu": "500m"} # True fallback
+        return value
+
+    def _target_container(self) -> Optional[str]:
+        """Container name the intent is restricted to, if the AI specified one."""
+        return (self.intent.get("conditions") or {}).get("container_name")
 
     def _build_patch_base(self) -> Dict[str, Any]:
         """Build the base structure of a patch."""
-        patch = {
+        metadata = self.resource.get("metadata") or {}
+        patch_metadata = {"name": metadata.get("name")}
+        namespace = metadata.get("namespace")
+        if namespace:
+            patch_metadata["namespace"] = namespace
+        return {
             "apiVersion": self.resource.get("apiVersion"),
             "kind": self.resource.get("kind"),
-            "metadata": {
-                "name": self.resource.get("metadata", {}).get("name"),
-            }
+            "metadata": patch_metadata
         }
-        namespace = self.resource.get("metadata", {}).get("namespace")
-        if namespace:
-            patch["metadata"]["namespace"] = namespace
-        return patch
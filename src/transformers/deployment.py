@@ -1,73 +1,55 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base import BaseTransformer
 
 class DeploymentTransformer(BaseTransformer):
     """Transformer for Deployment resources."""
 
-    def transform(self) -> Dict[str, Any]:
-        target_field = self.intent.get("target_field", "")
-
-        if "resources.limits" in target_field or "resources" in target_field:
-            return self._add_resource_limits()
-        elif target_field == "image":
-            return self._update_image()
-        elif "probe" in target_field.lower():
-            return self._add_probe()
-        elif target_field == "labels":
-            return self._add_labels("spec.template.metadata")
-        elif target_field == "annotations":
-            return self._add_annotations("spec.template.metadata")
-        elif "securityContext" in target_field:
-            return self._add_security_context()
-        elif "replicas" in target_field:
-            return self._set_replicas()
-        else:
-            return None
+    HANDLERS = {
+        "resources": "_add_resource_limits",
+        "image": "_update_image",
+        "probe": "_add_probe",
+        "labels": "_add_labels",
+        "annotations": "_add_annotations",
+        "securityContext": "_add_security_context",
+        "replicas": "_set_replicas",
+    }
+
+    def _pod_spec(self) -> Dict[str, Any]:
+        spec = self.resource.get("spec") or {}
+        return (spec.get("template") or {}).get("spec") or {}
+
+    def _pod_spec_patch(self, pod_spec: Dict[str, Any]) -> Dict[str, Any]:
+        return {"template": {"spec": pod_spec}}
 
-    def _add_resource_limits(self) -> Dict[str, Any]:
+    def _add_resource_limits(self) -> Optional[Dict[str, Any]]:
         """Add memory or CPU limits to containers."""
         patch = self._build_patch_base()
-        value = self.intent.get("value", {})
-        target_field = self.intent.get("target_field", "").lower()
-        
-        # Normalize value if it's a string
-        if isinstance(value, str):
-            if "memory" in target_field:
-                value = {"memory": value}
-            elif "cpu" in target_field:
-                value = {"cpu": value}
-            else:
-                # Default to memory if we can't tell
-                value = {"memory": value}
-        
-        if not isinstance(value, dict):
-            value = {"memory": "512Mi", "cpu": "500m"} # True fallback
+        value = self._limits_value()
+        target_container = self._target_container()
 
-        containers = self.resource.get("spec", {}).get("template", {}).get("spec", {}).get("containers", [])
+        containers = self._containers
 
         # Create localized patch for containers
         patched_containers = []
         for c in containers:
-            container_patch = {"name": c["name"]}
-            
             # If AI specified a specific container name
-            target_container = self.intent.get("conditions", {}).get("container_name")
             if target_container and c["name"] != target_container:
                 continue
+
+            # Leave out containers whose limits already match
+            current = (c.get("resources") or {}).get("limits") or {}
+            if all(current.get(k) == v for k, v in value.items()):
+                continue
                 
-            container_patch["resources"] = { "limits": value }
-            patched_containers.append(container_patch)
-
-        patch["spec"] = {
-            "template": {
-                "spec": {
-                    "containers": patched_containers
-                }
-            }
-        }
+            patched_containers.append({"name": c["name"], "resources": {"limits": value}})
+
+        if not patched_containers:
+            return None
+
+        patch["spec"] = self._pod_spec_patch({"containers": patched_containers})
         return patch
 
-    def _update_image(self) -> Dict[str, Any]:
+    def _update_image(self) -> Optional[Dict[str, Any]]:
         """Update container images."""
         patch = self._build_patch_base()
         value = self.intent.get("value")
@@ -75,7 +57,15 @@ class DeploymentTransformer(BaseTransformer):
         from_prefix = value.get("from", "") if isinstance(value, dict) else ""
         to_image = value.get("to", value) if isinstance(value, dict) else value
 
-        containers = self.resource.get("spec", {}).get("template", {}).get("spec", {}).get("containers", [])
+        # No image to set (e.g. the AI returned "value": null)
+        if not isinstance(to_image, str) or not to_image:
+            return None
+
+        containers = self._containers
+
+        # Shape of the target image is the same for every container
+        to_has_registry = "/" in to_image
+        to_has_tag = ":" in to_image
 
         patched_containers = []
         for c in containers:
@@ -83,29 +73,26 @@ class DeploymentTransformer(BaseTransformer):
             
             if from_prefix and from_prefix in current_image:
                 new_image = current_image.replace(from_prefix, to_image)
-            elif "/" not in to_image and ":" in to_image and ":" in current_image:
-                # If target is like "nginx:1.16.0" and current is "nginx:1.15.0"
-                # Just replace the whole thing if it seems like a tag update
-                new_image = to_image
-            elif "/" not in current_image and "/" not in to_image:
-                # Simple case: both are just image[:tag]
+            elif to_has_registry or "/" not in current_image or (to_has_tag and ":" in current_image):
+                # A full reference, a plain image[:tag] replacing another, or a
+                # tag update ("nginx:1.16.0" over "nginx:1.15.0"): use it as is
                 new_image = to_image
             else:
-                # Fallback to original logic but with better naming
-                image_parts = current_image.split('/')
-                image_name = image_parts[-1]
-                
-                if "/" in to_image:
-                    new_image = to_image
-                else:
-                    new_image = f"{to_image}/{image_name}"
+                # Move the image name under the new registry prefix
+                new_image = f"{to_image}/{current_image.rpartition('/')[2]}"
+
+            if new_image == current_image:
+                continue
 
             patched_containers.append({
                 "name": c["name"],
                 "image": new_image
             })
 
-        patch["spec"] = { "template": { "spec": { "containers": patched_containers } } }
+        if not patched_containers:
+            return None
+
+        patch["spec"] = self._pod_spec_patch({"containers": patched_containers})
         return patch
 
     def _add_probe(self) -> Dict[str, Any]:
@@ -124,17 +111,11 @@ class DeploymentTransformer(BaseTransformer):
             "periodSeconds": 10
         }
 
-        containers = self.resource.get("spec", {}).get("template", {}).get("spec", {}).get("containers", [])
+        containers = self._containers
 
-        patch["spec"] = {
-            "template": {
-                "spec": {
-                    "containers": [
-                        {"name": c["name"], probe_type: probe} for c in containers
-                    ]
-                }
-            }
-        }
+        patch["spec"] = self._pod_spec_patch({
+            "containers": [{"name": c["name"], probe_type: probe} for c in containers]
+        })
         return patch
 
     def _add_labels(self, target_path: str = None) -> Dict[str, Any]:
@@ -153,7 +134,7 @@ class DeploymentTransformer(BaseTransformer):
         if not isinstance(value, dict):
             value = {"runAsNonRoot": True}
 
-        patch["spec"] = {"template": {"spec": {"securityContext": value}}}
+        patch["spec"] = self._pod_spec_patch({"securityContext": value})
         return patch
 
     def _set_replicas(self) -> Dict[str, Any]:
@@ -1,19 +1,26 @@
-from typing import Dict, Any, Type
+from typing import Dict, Any, Type, Optional
 from .base import BaseTransformer
 from .deployment import DeploymentTransformer
 from .pod import PodTransformer
 from .generic import GenericTransformer
 
-def get_transformer(resource: Dict[str, Any], intent: Dict[str, Any]) -> BaseTransformer:
-    """Factory function to get the appropriate transformer."""
-    kind = resource.get("kind", "").lower()
+# Lowercased kind -> transformer; kinds not listed use GenericTransformer.
+# Add other specific transformers here, e.g. "service": ServiceTransformer
+_TRANSFORMERS: Dict[str, Type[BaseTransformer]] = {
+    "deployment": DeploymentTransformer,
+    "pod": PodTransformer,
+}
+
+
+def get_transformer_class(kind: Optional[str]) -> Type[BaseTransformer]:
+    """Transformer class for a resource kind (case-insensitive)."""
+    return _TRANSFORMERS.get((kind or "").lower(), GenericTransformer)
 
-    if kind == "deployment":
-        return DeploymentTransformer(resource, intent)
-    elif kind == "pod":
-        return PodTransformer(resource, intent)
-    # Add other specific transformers here
-    # e.g., elif kind == "service":
-    #          return ServiceTransformer(resource, intent)
-    else:
-        return GenericTransformer(resource, intent)
+
+def get_transformer(
+    resource: Dict[str, Any],
+    intent: Dict[str, Any],
+    field: Optional[str] = None
+) -> BaseTransformer:
+    """Factory function to get the appropriate transformer."""
+    return get_transformer_class(resource.get("kind"))(resource, intent, field)
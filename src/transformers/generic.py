@@ -4,15 +4,16 @@ from .base import BaseTransformer
 class GenericTransformer(BaseTransformer):
     """Transformer for generic resources."""
 
-    def transform(self) -> Dict[str, Any]:
-        target_field = self.intent.get("target_field", "")
+    HANDLERS = {
+        "labels": "_add_labels",
+        "annotations": "_add_annotations",
+    }
 
-        if target_field == "labels":
-            return self._add_metadata("labels")
-        elif target_field == "annotations":
-            return self._add_metadata("annotations")
-        else:
-            return None
+    def _add_labels(self) -> Dict[str, Any]:
+        return self._add_metadata("labels")
+
+    def _add_annotations(self) -> Dict[str, Any]:
+        return self._add_metadata("annotations")
 
     def _add_metadata(self, field: str) -> Dict[str, Any]:
         """Add labels or annotations to resource metadata."""
@@ -1,57 +1,40 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base import BaseTransformer
 
 class PodTransformer(BaseTransformer):
     """Transformer for Pod resources."""
 
-    def transform(self) -> Dict[str, Any]:
-        target_field = self.intent.get("target_field", "")
+    HANDLERS = {
+        "resources": "_add_resource_limits",
+        "labels": "_add_labels",
+        "annotations": "_add_annotations",
+        "securityContext": "_add_security_context",
+    }
 
-        if "resources.limits" in target_field or "resources" in target_field:
-            return self._add_resource_limits()
-        elif target_field == "labels":
-            return self._add_labels()
-        elif target_field == "annotations":
-            return self._add_annotations()
-        elif "securityContext" in target_field:
-            return self._add_security_context()
-        else:
-            return None
-
-    def _add_resource_limits(self) -> Dict[str, Any]:
+    def _add_resource_limits(self) -> Optional[Dict[str, Any]]:
         """Add memory or CPU limits to containers."""
         patch = self._build_patch_base()
-        value = self.intent.get("value", {})
-        target_field = self.intent.get("target_field", "").lower()
-        
-        # Normalize value if it's a string
-        if isinstance(value, str):
-            if "memory" in target_field:
-                value = {"memory": value}
-            elif "cpu" in target_field:
-                value = {"cpu": value}
-            else:
-                value = {"memory": value}
-        
-        if not isinstance(value, dict):
-            value = {"memory": "512Mi", "cpu": "500m"}
+        value = self._limits_value()
+        target_container = self._target_container()
 
-        containers = self.resource.get("spec", {}).get("containers", [])
+        containers = self._containers
 
         patched_containers = []
         for c in containers:
-            container_patch = {"name": c["name"]}
-            
-            target_container = self.intent.get("conditions", {}).get("container_name")
             if target_container and c["name"] != target_container:
                 continue
+
+            # Leave out containers whose limits already match
+            current = (c.get("resources") or {}).get("limits") or {}
+            if all(current.get(k) == v for k, v in value.items()):
+                continue
                 
-            container_patch["resources"] = { "limits": value }
-            patched_containers.append(container_patch)
+            patched_containers.append({"name": c["name"], "resources": {"limits": value}})
+
+        if not patched_containers:
+            return None
 
-        patch["spec"] = {
-            "containers": patched_containers
-        }
+        patch["spec"] = self._pod_spec_patch({"containers": patched_containers})
         return patch
 
     def _add_labels(self) -> Dict[str, Any]:
@@ -70,5 +53,5 @@ class PodTransformer(BaseTransformer):
         if not isinstance(value, dict):
             value = {"runAsNonRoot": True}
 
-        patch["spec"] = {"securityContext": value}
+        patch["spec"] = self._pod_spec_patch({"securityContext": value})
         return patch
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """Debug Azure OpenAI response."""
-import sys
 import os
 import json
-sys.path.insert(0, '/app/src')
+
+# This script runs at import; when collected by pytest without credentials, skip it
+if __name__ != "__main__" and not (os.getenv("AZURE_OPENAI_API_KEY") and os.getenv("AZURE_OPENAI_ENDPOINT")):
+    import pytest
+    pytest.skip("Azure OpenAI credentials not set", allow_module_level=True)
 
 from openai import AzureOpenAI
 
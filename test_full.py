@@ -1,58 +1,70 @@
 #!/usr/bin/env python3
 """Full end-to-end test with better error handling."""
+import os
 import sys
 import json
 import traceback
-sys.path.insert(0, '/app/src')
 
-# Test 1: Import test
-print("=== Test 1: Import Check ===")
+# The intent test calls the configured AI provider; without credentials it
+# would only exercise the keyword fallback (covered by tests/)
+if os.getenv("AI_PROVIDER", "azure") == "gemini":
+    AI_CONFIGURED = bool(os.getenv("GEMINI_API_KEY"))
+else:
+    AI_CONFIGURED = bool(os.getenv("AZURE_OPENAI_API_KEY") and os.getenv("AZURE_OPENAI_ENDPOINT"))
+
+try:
+    import pytest
+    requires_ai = pytest.mark.skipif(not AI_CONFIGURED, reason="AI provider credentials not set")
+except ImportError:
+    def requires_ai(test):
+        return test
+
+# orjson pretty-prints several times faster; json is the fallback
 try:
-    from agents.intent_parser import IntentParser
+    import orjson
+
+    def _pp(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _pp(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+
+def test_imports():
+    from agents.intent_parser import get_intent_parser
     from agents.patch_generator import PatchGenerator
     from scanners.cluster_scanner import ClusterScanner
-    print("OK: All imports successful")
-except Exception as e:
-    print(f"FAIL: Import error: {e}")
-    traceback.print_exc()
-    sys.exit(1)
-
-# Test 2: Parser test
-print("\n=== Test 2: Intent Parser ===")
-try:
-    parser = IntentParser()
-    print(f"Provider: {parser.provider}")
-    print(f"Enabled: {parser.enabled}")
-    
-    intent = parser.parse('Add memory limit 512Mi to all deployments')
-    print(f"Intent: {json.dumps(intent, indent=2)}")
-    
-    if 'error' in intent:
-        print(f"FAIL: Parser returned error")
-    else:
-        print("OK: Intent parsed successfully")
-except Exception as e:
-    print(f"FAIL: Parser error: {e}")
-    traceback.print_exc()
 
-# Test 3: Scanner test
-print("\n=== Test 3: Cluster Scanner ===")
-try:
-    scanner = ClusterScanner()
-    resources = scanner.scan('deployments', 'dev')
-    print(f"Found {len(resources)} resources in dev namespace")
-    for r in resources:
-        print(f"  - {r['metadata']['name']}")
-    print("OK: Scanner working")
-except Exception as e:
-    print(f"FAIL: Scanner error: {e}")
-    traceback.print_exc()
-
-# Test 4: Patch generator test
-print("\n=== Test 4: Patch Generator ===")
-try:
-    generator = PatchGenerator()
-    
+
+@requires_ai
+def test_intent_parser():
+    from agents.intent_parser import get_intent_parser
+
+    parser = get_intent_parser()
+    assert parser.enabled, f"{parser.provider} parser failed to initialize"
+
+    result = parser.parse('Add memory limit 512Mi to all deployments')
+    print(f"Intent: {_pp(result)}")
+
+    assert 'error' not in result, f"Parser returned error: {result.get('error')}"
+    intent = result['intents'][0]
+    assert intent['resource_type'] == 'deployments'
+    assert 'resources' in intent['target_field']
+
+
+def test_cluster_scanner(cluster_scanner, dev_scans):
+    for (kind, namespace), found in dev_scans.items():
+        print(f"Found {len(found)} {kind} in {namespace} namespace")
+
+    # Streamed page by page; nothing keeps the whole list
+    streamed = [r['metadata']['name'] for r in cluster_scanner.iter_scan('deployments', 'dev')]
+    listed = [r['metadata']['name'] for r in dev_scans[('deployments', 'dev')]]
+    assert sorted(streamed) == sorted(listed)
+
+
+def test_patch_generator(dev_deployments):
+    from agents.patch_generator import PatchGenerator
+
     # Create a simple test intent
     test_intent = {
         "action": "add",
@@ -61,23 +73,52 @@ try:
         "value": {"memory": "512Mi", "cpu": "500m"},
         "namespace": "dev"
     }
-    
-    if resources:
-        patches = generator.generate(test_intent, resources)
-        print(f"Generated {len(patches)} patches")
-        
-        for p in patches:
-            print(f"\n--- Patch: {p['name']} ---")
-            print(p['yaml'][:500])
-        
-        if patches:
-            print("OK: Patches generated successfully")
-        else:
-            print("WARN: No patches generated")
+
+    with PatchGenerator() as generator:
+        patches = generator.generate(test_intent, dev_deployments)
+
+    for p in patches:
+        print(f"\n--- Patch: {p['name']} ---")
+        print(p['yaml'][:500])
+        assert p['kind'] == 'Deployment'
+        for c in p['patch']['spec']['template']['spec']['containers']:
+            assert c['resources']['limits'] == test_intent['value']
+
+
+def _run(step, *args) -> bool:
+    """Run a test step as a script, reporting failures instead of stopping."""
+    print(f"\n=== {step.__name__} ===")
+    try:
+        step(*args)
+        print("OK")
+        return True
+    except Exception as e:
+        print(f"FAIL: {step.__name__}: {e}")
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    if not _run(test_imports):
+        sys.exit(1)
+    if AI_CONFIGURED:
+        _run(test_intent_parser)
     else:
-        print("SKIP: No resources to patch")
-except Exception as e:
-    print(f"FAIL: Patch generator error: {e}")
-    traceback.print_exc()
+        print("\nSKIP: test_intent_parser (AI provider credentials not set)")
+
+    # Under pytest the dev_scans fixture (conftest.py) scans once per session
+    from scanners.cluster_scanner import ClusterScanner
+    scanners = []
+    scans = {}
+
+    def scan_cluster():
+        scanners.append(ClusterScanner())
+        scans.update(scanners[0].scan_many(
+            [('deployments', 'dev'), ('services', 'dev'), ('configmaps', 'dev')]
+        ))
+
+    if _run(scan_cluster):
+        _run(test_cluster_scanner, scanners[0], scans)
+        _run(test_patch_generator, scans[('deployments', 'dev')])
 
-print("\n=== Done ===")
+    print("\n=== Done ===")
@@ -1,12 +1,20 @@
 #!/usr/bin/env python3
 """Test intent parser."""
-import sys
 import json
-sys.path.insert(0, '/app/src')
 
-from agents.intent_parser import IntentParser
+# orjson pretty-prints several times faster; json is the fallback
+try:
+    import orjson
 
-parser = IntentParser()
+    def _pp(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _pp(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+from agents.intent_parser import get_intent_parser
+
+parser = get_intent_parser()
 result = parser.parse('Add memory limit 512Mi to all deployments')
 print("Intent Parser Result:")
-print(json.dumps(result, indent=2))
+print(_pp(result))
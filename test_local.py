@@ -3,10 +3,18 @@
 
 import os
 import sys
+import traceback
+import asyncio
 from dotenv import load_dotenv
 
-load_dotenv()
-sys.path.insert(0, 'src')
+# Under pytest, conftest.py loads .env once per session
+if __name__ == "__main__":
+    load_dotenv()
+
+# This script runs at import; when collected by pytest without credentials, skip it
+if __name__ != "__main__" and not (os.getenv("AZURE_OPENAI_API_KEY") and os.getenv("AZURE_OPENAI_ENDPOINT")):
+    import pytest
+    pytest.skip("Azure OpenAI credentials not set", allow_module_level=True)
 
 print("=" * 60)
 print("Testing Azure OpenAI Integration")
@@ -30,8 +38,8 @@ if not api_key or not endpoint:
 print("\nInitializing IntentParser...")
 
 try:
-    from agents.intent_parser import IntentParser
-    parser = IntentParser()
+    from agents.intent_parser import get_intent_parser
+    parser = get_intent_parser()
     
     if not parser.enabled:
         print("[ERROR] Parser not enabled")
@@ -40,23 +48,37 @@ try:
     print(f"  Provider: {parser.provider}")
     print("  [OK] Parser initialized")
     
-    # Test AI parsing
-    test_request = "Add memory limit 512Mi to all deployments in staging"
-    print(f"\nTest request: \"{test_request}\"")
+    # Test AI parsing; the requests run concurrently (bounded by AI_MAX_CONCURRENCY)
+    test_requests = [
+        "Add memory limit 512Mi to all deployments in staging",
+        "Add label team=platform to services in production",
+    ]
+    print(f"\nTest requests: {len(test_requests)}")
     print("Calling Azure OpenAI...")
     
-    result = parser.parse(test_request)
+    async def parse_batch():
+        try:
+            return await parser.aparse_batch(test_requests)
+        finally:
+            # Its connections belong to this asyncio.run() loop
+            await parser.aclose()
     
-    if result.get("error"):
-        print(f"[ERROR] {result['error']}")
-        sys.exit(1)
+    results = asyncio.run(parse_batch())
     
-    print("\n[SUCCESS] Azure OpenAI Response:")
-    print(f"  Action: {result.get('action')}")
-    print(f"  Resource: {result.get('resource_type')}")
-    print(f"  Field: {result.get('target_field')}")
-    print(f"  Value: {result.get('value')}")
-    print(f"  Namespace: {result.get('namespace')}")
+    for test_request, result in zip(test_requests, results):
+        print(f"\nRequest: \"{test_request}\"")
+        if result.get("error"):
+            print(f"[ERROR] {result['error']}")
+            sys.exit(1)
+        
+        intent = result["intents"][0]
+        
+        print("[SUCCESS] Azure OpenAI Response:")
+        print(f"  Action: {intent.get('action')}")
+        print(f"  Resource: {intent.get('resource_type')}")
+        print(f"  Field: {intent.get('target_field')}")
+        print(f"  Value: {intent.get('value')}")
+        print(f"  Namespace: {intent.get('namespace')}")
     
     print("\n" + "=" * 60)
     print("[PASS] Azure OpenAI integration working!")
@@ -64,6 +86,5 @@ try:
     
 except Exception as e:
     print(f"\n[ERROR] {e}")
-    import traceback
     traceback.print_exc()
     sys.exit(1)
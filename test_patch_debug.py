@@ -1,52 +1,58 @@
 #!/usr/bin/env python3
 """Debug patch generator - check kind."""
-import sys
 import json
-sys.path.insert(0, '/app/src')
+
+# orjson pretty-prints several times faster; json is the fallback
+try:
+    import orjson
+
+    def _pp(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _pp(obj) -> str:
+        return json.dumps(obj, indent=2)
 
 from agents.patch_generator import PatchGenerator
-from scanners.cluster_scanner import ClusterScanner
-
-scanner = ClusterScanner()
-resources = scanner.scan('deployments', 'dev')
-
-print(f"Found {len(resources)} resources")
-for r in resources:
-    name = r.get('metadata', {}).get('name')
-    kind = r.get('kind')
-    print(f"\nResource Name: {name}")
-    print(f"Resource Kind: {kind}")
-    print(f"Available keys: {list(r.keys())}")
-
-# Test patch generation
-print("\n=== Testing Patch Generator ===")
-generator = PatchGenerator()
-
-intent = {
-    "action": "add",
-    "resource_type": "deployments",
-    "target_field": "resources.limits",
-    "value": {"memory": "512Mi", "cpu": "500m"},
-    "namespace": "dev"
-}
-
-from transformers.factory import get_transformer
-
-for r in resources:
-    # Fix for missing kind in list items
-    if not r.get('kind') and 'spec' in r and 'template' in r['spec']:
-        r['kind'] = 'Deployment'
-        print(f"Manually set kind to {r['kind']}")
-
-    print(f"\nProcessing: {r['metadata']['name']}")
-    try:
-        transformer = get_transformer(r, intent)
-        print(f"  Transformer: {type(transformer).__name__}")
-        patch = transformer.transform()
-        if patch:
-            print(f"  Patch generated!")
-            print(f"  JSON: {json.dumps(patch, indent=2)}")
-        else:
-            print(f"  No patch returned")
-    except Exception as e:
-        print(f"  Error: {e}")
+
+
+def test_patch_generation(dev_deployments):
+    resources = dev_deployments
+
+    # Column views of the scan result, built once
+    names = [r.get('metadata', {}).get('name') for r in resources]
+    kinds = [r.get('kind') for r in resources]
+
+    print(f"Found {len(resources)} resources")
+    for r, name, kind in zip(resources, names, kinds):
+        print(f"\nResource Name: {name}")
+        print(f"Resource Kind: {kind}")
+        print(f"Available keys: {list(r.keys())}")
+
+    # Test patch generation
+    print("\n=== Testing Patch Generator ===")
+    generator = PatchGenerator()
+
+    intent = {
+        "action": "add",
+        "resource_type": "deployments",
+        "target_field": "resources.limits",
+        "value": {"memory": "512Mi", "cpu": "500m"},
+        "namespace": "dev"
+    }
+
+    # ClusterScanner sets kind on every list item, so nothing needs patching in
+    missing = [name for name, kind in zip(names, kinds) if not kind]
+    assert not missing, f"Resources without kind: {missing}"
+
+    # One transformer lookup per kind instead of one per resource
+    patches = generator.generate_batch(intent, resources)
+    print(f"\nGenerated {len(patches)} patches for {len(resources)} resources")
+    for p in patches:
+        print(f"\nPatch: {p['name']}")
+        print(f"  JSON: {_pp(p['patch'])}")
+
+
+if __name__ == "__main__":
+    from scanners.cluster_scanner import ClusterScanner
+
+    test_patch_generation(ClusterScanner().scan('deployments', 'dev'))
@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 """Test scanner in cluster."""
-import sys
-sys.path.insert(0, '/app/src')
 
-from scanners.cluster_scanner import ClusterScanner
 
-scanner = ClusterScanner()
-result = scanner.scan('deployments', 'dev')
-print(f'Found {len(result)} deployments in dev namespace:')
-for r in result:
-    print(f'  - {r["metadata"]["name"]}')
+def test_scan_dev_deployments(dev_deployments):
+    print(f'Found {len(dev_deployments)} deployments in dev namespace:')
+    for r in dev_deployments:
+        print(f'  - {r["metadata"]["name"]}')
+
+
+if __name__ == "__main__":
+    from scanners.cluster_scanner import ClusterScanner
+
+    test_scan_dev_deployments(ClusterScanner().scan('deployments', 'dev'))
@@ -0,0 +1,117 @@
+import unittest
+from unittest import mock
+from kubernetes.client.rest import ApiException
+from src.scanners.cluster_scanner import ClusterScanner
+
+
+def make_scanner(**kwargs):
+    """ClusterScanner that never loads a kubeconfig or reaches a cluster."""
+    with mock.patch.object(ClusterScanner, "_load_config"):
+        return ClusterScanner(**kwargs)
+
+
+class TestScanCache(unittest.TestCase):
+
+    def setUp(self):
+        self.scanner = make_scanner(scan_cache_ttl=30)
+        self.addCleanup(self.scanner.close)
+        self.listed = [{"kind": "Deployment", "metadata": {"name": "web", "labels": {"app": "web"}}}]
+        self.scanner._list_kind = mock.Mock(side_effect=lambda *a: [dict(r) for r in self.listed])
+
+    def test_hit_skips_list_call(self):
+        self.scanner.scan("deployments", "dev")
+        self.scanner.scan("deployments", "dev")
+        self.assertEqual(self.scanner._list_kind.call_count, 1)
+
+    def test_hits_are_isolated_from_caller_edits(self):
+        first = self.scanner.scan("deployments", "dev")
+        first[0]["metadata"]["labels"]["app"] = "mutated"
+        first.append({"kind": "Deployment", "metadata": {"name": "extra"}})
+
+        second = self.scanner.scan("deployments", "dev")
+        self.assertEqual(len(second), 1)
+        self.assertEqual(second[0]["metadata"]["labels"]["app"], "web")
+
+    def test_disabled_by_default(self):
+        scanner = make_scanner()
+        self.addCleanup(scanner.close)
+        scanner._list_kind = mock.Mock(return_value=[])
+        scanner.scan("deployments", "dev")
+        scanner.scan("deployments", "dev")
+        self.assertEqual(scanner._list_kind.call_count, 2)
+
+    def test_partial_all_scan_not_cached(self):
+        def list_kind(kind, namespace, labels):
+            if kind == "Service":
+                raise ApiException(status=403, reason="Forbidden")
+            return [{"kind": kind, "metadata": {"name": "web"}}]
+
+        self.scanner._list_kind = mock.Mock(side_effect=list_kind)
+        resources = self.scanner.scan("all", "dev")
+        self.assertEqual([r["kind"] for r in resources], ["Deployment", "Pod"])
+
+        self.scanner.scan("all", "dev")
+        self.assertEqual(self.scanner._list_kind.call_count, 6)
+
+
+class TestWatchCacheScan(unittest.TestCase):
+
+    def test_results_are_isolated_from_the_cache(self):
+        scanner = make_scanner()
+        self.addCleanup(scanner.close)
+        cached = [{"kind": "Deployment", "metadata": {"name": "web", "labels": {"app": "web"}}}]
+        scanner._watch_caches = {"Deployment": mock.Mock(synced=True, **{"items.return_value": cached})}
+
+        first = scanner.scan("deployments", "dev", "app=web")
+        first[0]["metadata"]["labels"]["app"] = "mutated"
+
+        self.assertEqual(cached[0]["metadata"]["labels"]["app"], "web")
+        self.assertEqual(scanner.scan("deployments", "dev", "app=web"), cached)
+
+
+def make_patch(name, labels, patch_name=None):
+    return {
+        "name": patch_name or f"deployment-{name}",
+        "kind": "Deployment",
+        "namespace": "dev",
+        "patch": {"metadata": {"name": name, "labels": labels}},
+    }
+
+
+class TestApplyPatches(unittest.TestCase):
+
+    def setUp(self):
+        self.scanner = make_scanner()
+        self.addCleanup(self.scanner.close)
+
+        def patch_deployment(name, namespace, body):
+            if name == "broken":
+                raise ApiException(status=422, reason="Unprocessable Entity")
+
+        self.scanner.apps_v1 = mock.Mock()
+        self.scanner.apps_v1.patch_namespaced_deployment.side_effect = patch_deployment
+
+    def test_duplicates_applied_once_with_per_patch_status(self):
+        patches = [
+            make_patch("web", {"team": "platform"}),
+            make_patch("broken", {"team": "platform"}),
+            # Same change as the first patch, from another intent
+            make_patch("web", {"team": "platform"}, patch_name="deployment-web-again"),
+            make_patch("web", {"team": "data"}, patch_name="deployment-web-data"),
+        ]
+        statuses = self.scanner.apply_patches(patches)
+
+        self.assertEqual(self.scanner.apps_v1.patch_namespaced_deployment.call_count, 3)
+        self.assertEqual([s["name"] for s in statuses], [p["name"] for p in patches])
+        self.assertEqual([s["applied"] for s in statuses], [True, False, True, True])
+        self.assertEqual(statuses[1]["error"], "422 Unprocessable Entity")
+        self.assertIsNone(statuses[0]["error"])
+
+    def test_single_patch_status(self):
+        statuses = self.scanner.apply_patches([make_patch("broken", {})])
+        self.assertEqual(statuses, [{"name": "deployment-broken", "applied": False,
+                                     "error": "422 Unprocessable Entity"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
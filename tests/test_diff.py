@@ -0,0 +1,91 @@
+import subprocess
+import unittest
+from unittest import mock
+from src.outputs.diff import DiffPreview
+
+# Captured `kubectl diff -f -` output for a Deployment and a Service (exit code 1)
+WEB_DIFF = """\
+diff -u -N /tmp/LIVE-1416285823/apps.v1.Deployment.dev.web /tmp/MERGED-2843771405/apps.v1.Deployment.dev.web
+--- /tmp/LIVE-1416285823/apps.v1.Deployment.dev.web\t2024-05-02 10:11:12.000000000 +0000
++++ /tmp/MERGED-2843771405/apps.v1.Deployment.dev.web\t2024-05-02 10:11:12.000000000 +0000
+@@ -30,6 +30,9 @@
+         image: nginx:1.25
+         name: web
+-        resources: {}
++        resources:
++          limits:
++            memory: 512Mi
+"""
+API_DIFF = """\
+diff -u -N /tmp/LIVE-1416285823/v1.Service.dev.api.v2 /tmp/MERGED-2843771405/v1.Service.dev.api.v2
+--- /tmp/LIVE-1416285823/v1.Service.dev.api.v2\t2024-05-02 10:11:12.000000000 +0000
++++ /tmp/MERGED-2843771405/v1.Service.dev.api.v2\t2024-05-02 10:11:12.000000000 +0000
+@@ -6,6 +6,7 @@
+   labels:
+     app: api
++    team: platform
+"""
+
+
+def make_patch(kind, name, namespace="dev"):
+    return {
+        "name": f"{kind.lower()}-{name}",
+        "kind": kind,
+        "namespace": namespace,
+        "patch": {"metadata": {"name": name}},
+        "yaml": f"kind: {kind}\nmetadata:\n  name: {name}\n",
+        "diff": None,
+    }
+
+
+def completed(returncode, stdout=""):
+    return subprocess.CompletedProcess(["kubectl", "diff", "-f", "-"], returncode, stdout, "")
+
+
+class TestKubectlDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.preview = DiffPreview()
+        self.web = make_patch("Deployment", "web")
+        self.api = make_patch("Service", "api.v2")
+        self.worker = make_patch("Deployment", "worker")
+
+    def test_batched_output_split_per_resource(self):
+        with mock.patch.object(self.preview, "_run_diff", return_value=completed(1, WEB_DIFF + API_DIFF)) as run:
+            output = self.preview.kubectl_diff([self.api, self.worker, self.web])
+
+        self.assertEqual(run.call_count, 1)
+        self.assertEqual(output, f"--- service-api.v2 ---\n{API_DIFF}\n--- deployment-web ---\n{WEB_DIFF}")
+
+    def test_no_differences(self):
+        with mock.patch.object(self.preview, "_run_diff", return_value=completed(0)):
+            output = self.preview.kubectl_diff([self.web, self.api])
+        self.assertEqual(output, "No differences found")
+
+    def test_kubectl_error_falls_back_to_single_diffs(self):
+        results = [completed(2), completed(1, WEB_DIFF), completed(0)]
+        with mock.patch.object(self.preview, "_run_diff", side_effect=results) as run:
+            output = self.preview.kubectl_diff([self.web, self.worker])
+
+        self.assertEqual(run.call_count, 3)
+        self.assertEqual(output, f"--- deployment-web ---\n{WEB_DIFF}")
+
+    def test_reuse_local_skips_kubectl(self):
+        self.web["diff"] = "local diff"
+        with mock.patch.object(self.preview, "_run_diff", return_value=completed(1, API_DIFF)) as run:
+            output = self.preview.kubectl_diff([self.web, self.api])
+
+        run.assert_called_once_with(self.api["yaml"])
+        self.assertEqual(output, f"--- deployment-web ---\nlocal diff\n--- service-api.v2 ---\n{API_DIFF}")
+
+    def test_resource_key_from_file_name(self):
+        key = self.preview._resource_key
+        self.assertEqual(key("/tmp/MERGED-1/apps.v1.Deployment.dev.web"), ("Deployment", "dev", "web"))
+        self.assertEqual(key("/tmp/MERGED-1/v1.Service.dev.api.v2"), ("Service", "dev", "api.v2"))
+        self.assertEqual(
+            key("/tmp/MERGED-1/networking.k8s.io.v1.Ingress.prod.site"), ("Ingress", "prod", "site")
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,36 +1,181 @@
+import asyncio
 import unittest
-from src.agents.intent_parser import IntentParser
+from types import SimpleNamespace
+from unittest import mock
+from src.agents.intent_parser import IntentParser, _is_transient
+
+# Request -> fields its fallback intent must have
+FALLBACK_CASES = [
+    ("Add memory limit 512Mi to all deployments",
+     {"action": "add", "resource_type": "deployments", "target_field": "resources.limits.memory"}),
+    ("Update images from docker.io to ecr.aws",
+     {"action": "update", "resource_type": "deployments", "target_field": "image"}),
+    ("Add label team=platform to services",
+     {"action": "add", "resource_type": "services", "target_field": "labels"}),
+    ("Add memory limit 512Mi to all deployments in staging",
+     {"namespace": "staging"}),
+]
+FALLBACK_REQUESTS = [request for request, _ in FALLBACK_CASES]
 
 class TestIntentParser(unittest.TestCase):
 
     def setUp(self):
         self.parser = IntentParser()
+        # Results persisted by earlier runs must not satisfy cache-miss assertions
+        self.parser._disk_cache = None
+
+    def test_fallback_parse(self):
+        self.parser.enabled = False
+        for request, expected in FALLBACK_CASES:
+            with self.subTest(request=request):
+                intent = self.parser.parse(request)['intents'][0]
+                for field, value in expected.items():
+                    self.assertEqual(intent[field], value)
+
+    def test_fallback_parse_batch_matches_single(self):
+        batch = self.parser._fallback_parse_batch(FALLBACK_REQUESTS)
+        self.assertEqual(len(batch), len(FALLBACK_REQUESTS))
+        for request, intent in zip(FALLBACK_REQUESTS, batch):
+            self.assertEqual(intent, self.parser._fallback_parse(request))
+
+    def test_parse_without_ai_returns_intents_list(self):
+        result = self.parser.parse("Add label team=platform to services")
+        self.assertEqual(len(result['intents']), 1)
+        self.assertEqual(result['intents'][0]['target_field'], 'labels')
+
+    def test_aparse_batch_preserves_order(self):
+        requests = [
+            "Add memory limit 512Mi to all deployments",
+            "Add label team=platform to services",
+        ]
+        results = asyncio.run(self.parser.aparse_batch(requests))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['intents'][0]['target_field'], 'resources.limits.memory')
+        self.assertEqual(results[1]['intents'][0]['resource_type'], 'services')
+
+    def test_aparse_batch_across_event_loops(self):
+        async def fake_adispatch(prompt):
+            await asyncio.sleep(0)
+            return {"intents": [{"action": "add", "resource_type": "pods", "target_field": "labels"}]}
+
+        self.parser.enabled = True
+        self.parser._adispatch = fake_adispatch
+        for run in range(2):
+            # More uncached requests than AI_MAX_CONCURRENCY, so the semaphore has waiters
+            requests = [f"Label pods {run}-{i}" for i in range(40)]
+            results = asyncio.run(self.parser.aparse_batch(requests))
+            self.assertTrue(all('intents' in r for r in results))
+
+    def test_async_client_per_event_loop(self):
+        class FakeClient:
+            closed = False
+
+            async def close(self):
+                self.closed = True
+
+        async def client_and_close():
+            client = self.parser._aclient()
+            self.assertIs(self.parser._aclient(), client)
+            await self.parser.aclose()
+            return client
+
+        self.parser._azure_credentials = ("key", "https://example", "v1")
+        with mock.patch("src.agents.intent_parser._new_async_azure_client", side_effect=lambda *a: FakeClient()):
+            first = asyncio.run(client_and_close())
+            second = asyncio.run(client_and_close())
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed and second.closed)
+
+    def test_parse_caches_normalized_requests(self):
+        calls = []
+
+        def fake_azure(prompt):
+            calls.append(prompt)
+            return {"intents": [{"action": "add", "resource_type": "deployments", "target_field": "labels"}]}
+
+        self.parser.enabled = True
+        self.parser._dispatch = fake_azure
+
+        first = self.parser.parse("Add label env=prod")
+        first["intents"][0]["action"] = "mutated"
+        second = self.parser.parse("  Add label   env=prod ")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second["intents"][0]["action"], "add")
+
+    def test_parse_response_json_mode(self):
+        text = '{"intents": [{"action": "set", "resource_type": "deployments", "target_field": "replicas", "value": 3}]}'
+        result = self.parser._parse_response(text)
+        self.assertEqual(result['intents'][0]['value'], 3)
+
+    def test_parse_response_markdown_fallback(self):
+        text = 'Here you go:\n```json\n{"action": "add", "target_field": "labels",}\n```'
+        result = self.parser._parse_response(text)
+        self.assertEqual(result['intents'][0]['target_field'], 'labels')
+        self.assertEqual(result['intents'][0]['resource_type'], 'unknown')
+
+    def test_first_valid_skips_incomplete_choices(self):
+        choices = [
+            SimpleNamespace(message=SimpleNamespace(content='{"action": "add"}')),
+            SimpleNamespace(message=SimpleNamespace(content='{"action": "add", "resource_type": "pods", "target_field": "labels"}')),
+        ]
+        result = self.parser._first_valid(choices)
+        self.assertEqual(result['intents'][0]['resource_type'], 'pods')
+
+    def test_astream_intents_yields_each_complete_intent(self):
+        chunks = ['{"intents": [{"action": "add", "resource_type": "depl', 'oyments", "target_field": "labels"},',
+                  ' {"action": "set", "target_field": "replicas", "value": 2}', ']}']
+
+        async def fake_stream(prompt):
+            for chunk in chunks:
+                yield chunk
+
+        async def collect():
+            return [intent async for intent in self.parser.astream_intents("Add label and scale")]
+
+        self.parser.enabled = True
+        self.parser._astream_text = fake_stream
+        intents = asyncio.run(collect())
+        self.assertEqual([i['target_field'] for i in intents], ['labels', 'replicas'])
+        self.assertEqual(intents[1]['resource_type'], 'unknown')
+
+    def test_astream_intents_reports_error_after_partial_output(self):
+        async def failing_stream(prompt):
+            yield '{"intents": [{"action": "add", "resource_type": "deployments", "target_field": "labels"},'
+            raise ConnectionError("stream reset")
+
+        async def collect():
+            return [intent async for intent in self.parser.astream_intents("Add label and scale")]
+
+        self.parser.enabled = True
+        self.parser._astream_text = failing_stream
+        intents = asyncio.run(collect())
+        self.assertEqual(intents[0]['target_field'], 'labels')
+        self.assertEqual(intents[1], {"error": "stream reset"})
+
+    def test_is_transient(self):
+        from google.api_core import exceptions as google_exceptions
+        self.assertTrue(_is_transient(google_exceptions.ResourceExhausted("quota exceeded")))
+        self.assertTrue(_is_transient(google_exceptions.ServiceUnavailable("try again")))
+        self.assertFalse(_is_transient(google_exceptions.InvalidArgument("bad request")))
+        self.assertFalse(_is_transient(ValueError("not an API error")))
+
+    def test_parse_many_splits_batched_response(self):
+        calls = []
+
+        def fake_azure(prompt, max_tokens=None):
+            calls.append(prompt)
+            return {"intents": [
+                {"request_id": 1, "action": "set", "resource_type": "deployments", "target_field": "replicas"},
+                {"request_id": 0, "action": "add", "resource_type": "services", "target_field": "labels"},
+            ]}
 
-    def test_fallback_parse_add_memory_limit(self):
-        request = "Add memory limit 512Mi to all deployments"
-        intent = self.parser._fallback_parse(request)
-        self.assertEqual(intent['action'], 'add')
-        self.assertEqual(intent['resource_type'], 'deployments')
-        self.assertEqual(intent['target_field'], 'resources.limits.memory')
-
-    def test_fallback_parse_update_image(self):
-        request = "Update images from docker.io to ecr.aws"
-        intent = self.parser._fallback_parse(request)
-        self.assertEqual(intent['action'], 'update')
-        self.assertEqual(intent['resource_type'], 'deployments')
-        self.assertEqual(intent['target_field'], 'image')
-
-    def test_fallback_parse_add_label(self):
-        request = "Add label team=platform to services"
-        intent = self.parser._fallback_parse(request)
-        self.assertEqual(intent['action'], 'add')
-        self.assertEqual(intent['resource_type'], 'services')
-        self.assertEqual(intent['target_field'], 'labels')
-
-    def test_fallback_parse_with_namespace(self):
-        request = "Add memory limit 512Mi to all deployments in staging"
-        intent = self.parser._fallback_parse(request)
-        self.assertEqual(intent['namespace'], 'staging')
+        self.parser.enabled = True
+        self.parser._dispatch = fake_azure
+        results = self.parser.parse_many(["Label services", "Scale deployments"])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results[0]['intents'][0]['target_field'], 'labels')
+        self.assertEqual(results[1]['intents'][0]['target_field'], 'replicas')
+        self.assertNotIn('request_id', results[1]['intents'][0])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from src.agents.patch_generator import PatchGenerator
+
+INTENT = {"action": "add", "resource_type": "deployments", "target_field": "labels", "value": {"team": "platform"}}
+
+
+def deployment(name):
+    return {"apiVersion": "apps/v1", "kind": "Deployment", "metadata": {"name": name, "namespace": "dev"}}
+
+
+class TestPatchGeneratorPool(unittest.TestCase):
+
+    def test_pool_shut_down_on_exit(self):
+        resources = [deployment("web"), deployment("api")]
+        with PatchGenerator() as generator:
+            generator.max_workers = 2
+            patches = generator.generate(INTENT, resources, include_preview=False)
+            pool = generator._pool
+            self.assertIsNotNone(pool)
+
+        self.assertEqual([p["name"] for p in patches], ["deployment-web", "deployment-api"])
+        self.assertIsNone(generator._pool)
+        with self.assertRaises(RuntimeError):
+            pool.submit(print)
+
+    def test_close_without_pool(self):
+        generator = PatchGenerator()
+        generator.close()
+        self.assertIsNone(generator._pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import copy
+import random
+import unittest
+from src.agents.patch_merge import deep_merge, merge_containers
+
+
+def recursive_merge(base, extra):
+    """The recursive merge deep_merge replaced, kept as a reference."""
+    for k, v in extra.items():
+        if isinstance(v, dict) and k in base and isinstance(base[k], dict):
+            recursive_merge(base[k], v)
+        elif isinstance(v, list) and k in base and isinstance(base[k], list):
+            if k == "containers" or k == "initContainers":
+                base_map = {c["name"]: c for c in base[k]}
+                for extra_c in v:
+                    name = extra_c.get("name")
+                    if name in base_map:
+                        recursive_merge(base_map[name], extra_c)
+                    else:
+                        base[k].append(extra_c)
+            else:
+                for item in v:
+                    if item not in base[k]:
+                        base[k].append(item)
+        else:
+            base[k] = v
+
+
+def random_tree(rng, depth=0):
+    """Random patch-like dict with nested dicts, lists and container lists."""
+    tree = {}
+    for _ in range(rng.randint(0, 4)):
+        key = rng.choice(["a", "b", "c", "labels", "spec", "containers", "args"])
+        if key == "containers":
+            tree[key] = [
+                dict(random_tree(rng, depth + 1), name=rng.choice(["app", "sidecar", "init"]))
+                for _ in range(rng.randint(0, 3))
+            ]
+        elif key == "args" or (depth < 3 and rng.random() < 0.2):
+            tree[key] = [rng.choice(["x", "y", 1, None]) for _ in range(rng.randint(0, 3))]
+        elif depth < 3 and rng.random() < 0.5:
+            tree[key] = random_tree(rng, depth + 1)
+        else:
+            tree[key] = rng.choice(["v1", "v2", 0, 5, None, True])
+    return tree
+
+
+class TestDeepMerge(unittest.TestCase):
+
+    def test_nested_dicts(self):
+        base = {"metadata": {"name": "web", "labels": {"app": "web"}}}
+        deep_merge(base, {"metadata": {"labels": {"team": "platform"}, "annotations": {"a": "1"}}})
+        self.assertEqual(base, {"metadata": {
+            "name": "web",
+            "labels": {"app": "web", "team": "platform"},
+            "annotations": {"a": "1"},
+        }})
+
+    def test_scalar_overwrite(self):
+        base = {"spec": {"replicas": 1, "paused": False}, "value": {"nested": 1}}
+        deep_merge(base, {"spec": {"replicas": 3}, "value": None})
+        self.assertEqual(base, {"spec": {"replicas": 3, "paused": False}, "value": None})
+
+    def test_containers_merged_by_name(self):
+        base = {"containers": [{"name": "app", "image": "web:1", "resources": {"limits": {"cpu": "1"}}}]}
+        deep_merge(base, {"containers": [
+            {"name": "app", "resources": {"limits": {"memory": "512Mi"}}},
+            {"name": "sidecar", "image": "proxy:2"},
+        ]})
+        self.assertEqual(base["containers"], [
+            {"name": "app", "image": "web:1", "resources": {"limits": {"cpu": "1", "memory": "512Mi"}}},
+            {"name": "sidecar", "image": "proxy:2"},
+        ])
+
+    def test_init_containers_merged_by_name(self):
+        base = {"initContainers": [{"name": "setup", "image": "busybox:1"}]}
+        deep_merge(base, {"initContainers": [{"name": "setup", "image": "busybox:2"}]})
+        self.assertEqual(base, {"initContainers": [{"name": "setup", "image": "busybox:2"}]})
+
+    def test_other_lists_extended_without_duplicates(self):
+        base = {"args": ["--a", "--b"]}
+        deep_merge(base, {"args": ["--b", "--c"]})
+        self.assertEqual(base, {"args": ["--a", "--b", "--c"]})
+
+    def test_empty_inputs(self):
+        base = {"a": {"b": 1}}
+        deep_merge(base, {})
+        self.assertEqual(base, {"a": {"b": 1}})
+
+        base = {}
+        deep_merge(base, {"a": {"b": [1]}})
+        self.assertEqual(base, {"a": {"b": [1]}})
+
+        base = {"containers": []}
+        deep_merge(base, {"containers": []})
+        self.assertEqual(base, {"containers": []})
+
+    def test_merge_containers_returns_pairs_to_merge(self):
+        app = {"name": "app"}
+        base_list = [app]
+        extra_app = {"name": "app", "image": "web:2"}
+        pairs = merge_containers(base_list, [extra_app, {"name": "new"}])
+        self.assertEqual(pairs, [(app, extra_app)])
+        self.assertEqual([c["name"] for c in base_list], ["app", "new"])
+
+    def test_matches_recursive_merge(self):
+        rng = random.Random(1234)
+        for i in range(500):
+            base, extra = random_tree(rng), random_tree(rng)
+            expected = copy.deepcopy(base)
+            recursive_merge(expected, copy.deepcopy(extra))
+            actual = copy.deepcopy(base)
+            deep_merge(actual, copy.deepcopy(extra))
+            with self.subTest(case=i):
+                self.assertEqual(actual, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from src.transformers.factory import get_transformer
+
+
+def deployment(*containers):
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {"name": "web", "namespace": "dev"},
+        "spec": {"template": {"spec": {"containers": list(containers)}}},
+    }
+
+
+def transform(resource, target_field, value):
+    intent = {"action": "update", "resource_type": "deployments", "target_field": target_field, "value": value}
+    return get_transformer(resource, intent).transform()
+
+
+class TestDeploymentImage(unittest.TestCase):
+
+    def test_unchanged_containers_give_no_patch(self):
+        resource = deployment({"name": "app", "image": "nginx:1.25"})
+        self.assertIsNone(transform(resource, "image", "nginx:1.25"))
+
+    def test_mixed_containers_patch_only_changed(self):
+        resource = deployment(
+            {"name": "app", "image": "docker.io/library/nginx:1.25"},
+            {"name": "proxy", "image": "ecr.aws/envoy:1.30"},
+        )
+        patch = transform(resource, "image", {"from": "docker.io/library", "to": "ecr.aws"})
+        self.assertEqual(patch["spec"]["template"]["spec"]["containers"], [
+            {"name": "app", "image": "ecr.aws/nginx:1.25"},
+        ])
+        self.assertEqual(patch["metadata"], {"name": "web", "namespace": "dev"})
+
+    def test_registry_prefix_moves_image_name(self):
+        resource = deployment({"name": "app", "image": "docker.io/nginx:1.25"})
+        patch = transform(resource, "image", "ecr.aws")
+        self.assertEqual(patch["spec"]["template"]["spec"]["containers"][0]["image"], "ecr.aws/nginx:1.25")
+
+    def test_missing_image_value_gives_no_patch(self):
+        resource = deployment({"name": "app", "image": "nginx:1.25"})
+        for value in (None, "", {"from": "docker.io", "to": None}, 3):
+            with self.subTest(value=value):
+                self.assertIsNone(transform(resource, "image", value))
+
+
+class TestDeploymentLimits(unittest.TestCase):
+
+    def test_matching_limits_give_no_patch(self):
+        resource = deployment({"name": "app", "resources": {"limits": {"memory": "512Mi", "cpu": "1"}}})
+        self.assertIsNone(transform(resource, "resources.limits.memory", "512Mi"))
+
+    def test_mixed_containers_patch_only_changed(self):
+        resource = deployment(
+            {"name": "app", "resources": {"limits": {"memory": "512Mi"}}},
+            {"name": "sidecar"},
+        )
+        patch = transform(resource, "resources.limits.memory", "512Mi")
+        self.assertEqual(patch["spec"]["template"]["spec"]["containers"], [
+            {"name": "sidecar", "resources": {"limits": {"memory": "512Mi"}}},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import copy
+import queue
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from kubernetes.client.rest import ApiException
+from src.scanners.watch_cache import KindCache, matches_selector, parse_selector
+
+
+def selects(selector, labels):
+    return matches_selector(labels, parse_selector(selector))
+
+
+class TestSelectors(unittest.TestCase):
+
+    def test_equality(self):
+        self.assertTrue(selects("app=web", {"app": "web"}))
+        self.assertTrue(selects("app==web", {"app": "web", "tier": "fe"}))
+        self.assertFalse(selects("app=web", {"app": "api"}))
+        self.assertFalse(selects("app=web", {}))
+
+    def test_inequality(self):
+        self.assertTrue(selects("app!=web", {"app": "api"}))
+        self.assertTrue(selects("app!=web", {}))
+        self.assertFalse(selects("app!=web", {"app": "web"}))
+
+    def test_in(self):
+        self.assertTrue(selects("env in (dev, staging)", {"env": "staging"}))
+        self.assertFalse(selects("env in (dev, staging)", {"env": "prod"}))
+        self.assertFalse(selects("env in (dev)", {}))
+
+    def test_notin(self):
+        self.assertTrue(selects("env notin (prod)", {"env": "dev"}))
+        self.assertTrue(selects("env notin (prod)", {}))
+        self.assertFalse(selects("env notin (prod,qa)", {"env": "qa"}))
+
+    def test_exists(self):
+        self.assertTrue(selects("team", {"team": "platform"}))
+        self.assertFalse(selects("team", {}))
+        self.assertTrue(selects("!legacy", {"team": "platform"}))
+        self.assertFalse(selects("!legacy", {"legacy": "true"}))
+
+    def test_combined_terms(self):
+        selector = "app.kubernetes.io/name=web, env in (dev,staging), !legacy"
+        self.assertEqual(parse_selector(selector), [
+            ("app.kubernetes.io/name", "=", "web"),
+            ("env", "in", frozenset({"dev", "staging"})),
+            ("legacy", "!", None),
+        ])
+        self.assertTrue(selects(selector, {"app.kubernetes.io/name": "web", "env": "dev"}))
+        self.assertFalse(selects(selector, {"app.kubernetes.io/name": "web", "env": "dev", "legacy": "1"}))
+
+    def test_empty_selects_everything(self):
+        self.assertEqual(parse_selector(None), [])
+        self.assertEqual(parse_selector(""), [])
+
+    def test_unsupported_left_to_api_server(self):
+        for selector in ["replicas>1", "a=b=c", "env in ()", "env in (a,(b))", "env in dev"]:
+            with self.subTest(selector=selector):
+                self.assertIsNone(parse_selector(selector))
+
+
+def resource(name, namespace="dev", labels=None):
+    return {"metadata": {"name": name, "namespace": namespace, "labels": labels or {}}}
+
+
+class FakeWatch:
+    """Stands in for kubernetes.watch.Watch; events are fed through a queue."""
+
+    def __init__(self, events):
+        self._events = events
+        self.resource_versions = []
+
+    def __call__(self):
+        return self
+
+    def stream(self, list_fn, resource_version, timeout_seconds):
+        self.resource_versions.append(resource_version)
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+    def stop(self):
+        self._events.put(None)
+
+
+class TestKindCache(unittest.TestCase):
+
+    def setUp(self):
+        self.events = queue.Queue()
+        self.fake_watch = FakeWatch(self.events)
+        patcher = mock.patch("src.scanners.watch_cache.watch.Watch", self.fake_watch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.lists = [
+            ([resource("web", labels={"app": "web"}), resource("db")], "1"),
+            ([resource("web", labels={"app": "web"}), resource("api", "prod")], "7"),
+        ]
+        self.list_fn = mock.Mock(side_effect=lambda: self._list())
+
+    def _list(self):
+        items, version = self.lists.pop(0) if len(self.lists) > 1 else self.lists[0]
+        return SimpleNamespace(items=items, metadata=SimpleNamespace(resource_version=version))
+
+    def start_cache(self):
+        cache = KindCache("Deployment", "apps/v1", self.list_fn, copy.deepcopy)
+        self.addCleanup(cache.stop)
+        self.wait_for(lambda: cache.synced)
+        return cache
+
+    def wait_for(self, condition, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("timed out waiting for the watch thread")
+            time.sleep(0.005)
+
+    def names(self, cache, namespace=None, selector=""):
+        return sorted(r["metadata"]["name"] for r in cache.items(namespace, parse_selector(selector)))
+
+    def test_initial_list(self):
+        cache = self.start_cache()
+        self.assertEqual(self.names(cache), ["db", "web"])
+        self.assertEqual(self.names(cache, selector="app=web"), ["web"])
+        item = cache.items("dev", [])[0]
+        self.assertEqual((item["kind"], item["apiVersion"]), ("Deployment", "apps/v1"))
+
+    def test_watch_events_update_copy(self):
+        cache = self.start_cache()
+        self.events.put({"type": "ADDED", "object": resource("worker", labels={"app": "worker"})})
+        self.events.put({"type": "MODIFIED", "object": resource("web", labels={"app": "web2"})})
+        self.events.put({"type": "DELETED", "object": resource("db")})
+        self.wait_for(lambda: self.names(cache) == ["web", "worker"])
+
+        self.assertEqual(self.names(cache, selector="app=web2"), ["web"])
+        self.assertEqual(self.fake_watch.resource_versions, ["1"])
+
+    def test_expired_watch_relists(self):
+        cache = self.start_cache()
+        # 410 Gone: the resourceVersion expired, so the cache must LIST again
+        self.events.put({"type": "ERROR", "object": {"code": 410}})
+        self.wait_for(lambda: self.list_fn.call_count == 2 and len(self.fake_watch.resource_versions) == 2)
+
+        self.assertEqual(self.names(cache), ["api", "web"])
+        self.assertEqual(self.names(cache, namespace="prod"), ["api"])
+        self.assertEqual(self.fake_watch.resource_versions, ["1", "7"])
+
+    def test_gone_exception_relists_without_backoff(self):
+        cache = self.start_cache()
+        # Recent clients raise 410 Gone from Watch.stream instead of yielding an ERROR event
+        with self.assertNoLogs("src.scanners.watch_cache", level="WARNING"):
+            self.events.put(ApiException(status=410, reason="Gone"))
+            self.wait_for(lambda: len(self.fake_watch.resource_versions) == 2)
+
+        self.assertTrue(cache.synced)
+        self.assertEqual(self.names(cache), ["api", "web"])
+        self.assertEqual(self.fake_watch.resource_versions, ["1", "7"])
+
+    def test_list_failure_marks_unsynced(self):
+        self.list_fn.side_effect = RuntimeError("connection refused")
+        cache = KindCache("Deployment", "apps/v1", self.list_fn, copy.deepcopy)
+        self.addCleanup(cache.stop)
+        self.wait_for(lambda: self.list_fn.call_count >= 1)
+        self.assertFalse(cache.synced)
+
+
+if __name__ == '__main__':
+    unittest.main()